@@ -1,14 +1,16 @@
+import asyncio
 import os
 from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
-from services.geocoding import geocode_address   # your fixed geocoder
+from services.geocoding import geocode_address, parse_latlng
 from services.analytics import log_event         # keep analytics
 
 from services.routing import (
@@ -37,10 +39,16 @@ print("DEBUG HERE_API_KEY:", ("<missing>" if not HERE_API_KEY else HERE_API_KEY[
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(APP_DIR, "static")
 
+# Resolved once at import so request handlers don't stat the filesystem
+INDEX_HTML = os.path.join(STATIC_DIR, "index.html")
+HAS_INDEX_HTML = os.path.exists(INDEX_HTML)
+_facilities_seed = os.path.join(APP_DIR, "data", "facilities_us_seed.json")
+FACILITIES_PATH: Optional[str] = _facilities_seed if os.path.exists(_facilities_seed) else None
+
 # -----------------------------
 # FastAPI setup
 # -----------------------------
-app = FastAPI(title="Car Hauler Backend")
+app = FastAPI(title="Car Hauler Backend", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -55,9 +63,8 @@ app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 @app.get("/")
 def index():
-    index_html = os.path.join(STATIC_DIR, "index.html")
-    if os.path.exists(index_html):
-        return FileResponse(index_html)
+    if HAS_INDEX_HTML:
+        return FileResponse(INDEX_HTML)
     return JSONResponse({"ok": True, "msg": "UI not found; static/index.html missing?"})
 
 # Optional small health/debug (won’t affect UI)
@@ -102,26 +109,13 @@ class PlanRequest(BaseModel):
 # -----------------------------
 # Geocoding helpers (accept address or lat,lng)
 # -----------------------------
-def _try_parse_latlng(text: str) -> Optional[Tuple[float, float]]:
-    """Return (lat,lng) if text looks like 'lat,lng'."""
-    if not isinstance(text, str) or "," not in text:
-        return None
-    a, b = text.split(",", 1)
-    try:
-        lat = float(a.strip())
-        lng = float(b.strip())
-        if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
-            return None
-        return (lat, lng)
-    except Exception:
-        return None
-
 def _resolve_place(text: str) -> Tuple[Tuple[float, float], str]:
     """
     Accepts either 'lat,lng' or a freeform address.
-    Uses your services.geocoding.geocode_address for addresses (US-biased).
+    Uses your services.geocoding.geocode_address for addresses (US-biased);
+    caching lives there, keyed on the normalized query.
     """
-    pair = _try_parse_latlng(text)
+    pair = parse_latlng(text)
     if pair:
         return (float(pair[0]), float(pair[1])), f"{pair[0]:.6f},{pair[1]:.6f}"
     # Address path
@@ -144,41 +138,39 @@ def suggest_layout_and_heights(cars: List[CarIn], deck_height_ft: float) -> Dict
       - Then fill top deck with remaining.
       - Compute loaded heights.
     """
-    norm: List[Dict[str, Any]] = []
-    for c in cars[:MAX_CARS]:
-        h = c.height_ft if (c.height_ft is not None) else 5.0
-        w = c.weight_lbs if (c.weight_lbs is not None) else 3500.0
-        norm.append({"car": c, "h": float(h), "w": float(w)})
-
-    norm.sort(key=lambda x: (-x["h"], x["w"]))
-    picked = norm[:MAX_CARS]
+    # Records are (-height, weight, input index, car) so a plain tuple sort gives
+    # tallest-first / lighter-first without a key function; the index keeps ties in
+    # input order and means CarIn objects are never compared.
+    picked = sorted(
+        (
+            -(float(c.height_ft) if c.height_ft is not None else 5.0),
+            float(c.weight_lbs) if c.weight_lbs is not None else 3500.0,
+            i,
+            c,
+        )
+        for i, c in enumerate(cars[:MAX_CARS])
+    )
 
     lower = picked[:5]
     upper = picked[5:]
 
     upper_offset = max(2.3, min(3.0, deck_height_ft * 0.5))
-    lower_loaded_max = max([deck_height_ft + x["h"] for x in lower], default=0.0)
-    upper_loaded_max = max([upper_offset + x["h"] for x in upper], default=0.0)
-
-    layout: Dict[str, Any] = {}
-
-    def _pack(names: List[str], arr: List[Dict[str, Any]], is_upper: bool):
-        for i, name in enumerate(names):
-            if i < len(arr):
-                car = arr[i]["car"]
-                base = upper_offset if is_upper else deck_height_ft
-                layout[name] = {
-                    "car": {
-                        "make": car.make, "model": car.model, "year": car.year,
-                        "height_ft": arr[i]["h"], "weight_lbs": arr[i]["w"]
-                    },
-                    "loaded_height_ft": round(base + arr[i]["h"], 2)
-                }
-            else:
-                layout[name] = None
-
-    _pack(SLOTS[:5], lower, is_upper=False)
-    _pack(SLOTS[5:], upper, is_upper=True)
+    # each deck list is already tallest-first
+    lower_loaded_max = deck_height_ft - lower[0][0] if lower else 0.0
+    upper_loaded_max = upper_offset - upper[0][0] if upper else 0.0
+
+    # One pass over all slots: first five sit on the deck, the rest on the upper offset.
+    # Slots without a car keep the None from fromkeys.
+    layout: Dict[str, Any] = dict.fromkeys(SLOTS)
+    bases = (deck_height_ft,) * 5 + (upper_offset,) * (len(SLOTS) - 5)
+    for name, base, (neg_h, w, _, car) in zip(SLOTS, bases, picked):
+        layout[name] = {
+            "car": {
+                "make": car.make, "model": car.model, "year": car.year,
+                "height_ft": -neg_h, "weight_lbs": w
+            },
+            "loaded_height_ft": round(base - neg_h, 2)
+        }
 
     return {
         "layout": layout,
@@ -199,14 +191,17 @@ def sum_weights(cars: List[CarIn], truck_lbs: float, trailer_lbs: float) -> floa
 # Route planning endpoint
 # -----------------------------
 @app.post("/plan-route")
-def plan_route(req: PlanRequest):
+async def plan_route(req: PlanRequest):
     if not req.cars:
         raise HTTPException(status_code=400, detail="Add at least one car.")
 
     # 1) Resolve origin/destination
     try:
-        (o_latlng, o_label) = _resolve_place(req.origin)
-        (d_latlng, d_label) = _resolve_place(req.destination)
+        # geocode both ends concurrently; each is up to a few HERE round-trips
+        (o_latlng, o_label), (d_latlng, d_label) = await asyncio.gather(
+            run_in_threadpool(_resolve_place, req.origin),
+            run_in_threadpool(_resolve_place, req.destination),
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -229,10 +224,10 @@ def plan_route(req: PlanRequest):
         "total_weight_kg": round(pounds_to_kg(total_weight_lbs), 1),
     }
 
-    # 3) Call routing (fallback handled inside)
+    # 3) Call routing (fallback handled inside); blocking HTTP, so keep it off the event loop
     try:
-        facilities_path = os.path.join(APP_DIR, "data", "facilities_us_seed.json")
-        route_pkg = plan_with_height_analysis(
+        route_pkg = await run_in_threadpool(
+            plan_with_height_analysis,
             start=o_latlng,
             end=d_latlng,
             height_m=feet_to_meters(total_height_ft),
@@ -243,7 +238,7 @@ def plan_route(req: PlanRequest):
             shipped_hazardous_goods=req.shipped_hazardous_goods,
             tunnel_category=req.tunnel_category,
             total_height_ft=total_height_ft,
-            facilities_file=facilities_path if os.path.exists(facilities_path) else None,
+            facilities_file=FACILITIES_PATH,
         )
     except HTTPException:
         raise
@@ -278,8 +273,8 @@ def plan_route(req: PlanRequest):
     except Exception:
         pass
 
-    # 6) Return full payload for the UI
-    return {
+    # 6) Return full payload for the UI (already plain dict/list/float, so skip jsonable_encoder)
+    return ORJSONResponse({
         "geocoding": {
             "origin_input": req.origin,
             "destination_input": req.destination,
@@ -303,4 +298,4 @@ def plan_route(req: PlanRequest):
         "decision": {
             "reason": route_pkg.get("chose_reason", ""),
         },
-    }
+    })
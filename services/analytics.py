@@ -1,13 +1,27 @@
 # services/analytics.py
-import os, json, time, hashlib, threading
-from datetime import datetime
-from typing import Any, Dict, Optional, Tuple
+import os, time, hashlib, threading, queue, atexit
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
 
 _LOCK = threading.Lock()
 
 ANALYTICS_ENABLE = os.getenv("ANALYTICS_ENABLE", "0") == "1"
 ANALYTICS_PATH = os.getenv("ANALYTICS_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "events.jsonl"))
 
+# Events are serialized on the caller's thread and appended to disk in batches by a
+# single background flusher, so requests never wait on file I/O.
+_FLUSH_MAX_EVENTS = 100
+_FLUSH_INTERVAL_SEC = 0.2
+# how long shutdown waits for the flusher to finish its last batch
+_EXIT_JOIN_SEC = 2.0
+_QUEUE: "queue.Queue[Any]" = queue.Queue(maxsize=10000)
+_STOP = object()
+_FLUSHER: Optional[threading.Thread] = None
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") — strftime only runs once per second
+_TS_CACHE: Tuple[int, str] = (-1, "")
+
 def _ensure_dir(path: str):
     d = os.path.dirname(path)
     if d and not os.path.exists(d):
@@ -28,16 +42,105 @@ def round_coord(latlng: Optional[Tuple[float,float]], places: int = 2) -> Option
     (lat, lng) = latlng
     return (round(float(lat), places), round(float(lng), places))
 
+def _utc_iso_now() -> str:
+    """UTC timestamp in the same shape as datetime.utcnow().isoformat() + 'Z'."""
+    global _TS_CACHE
+    sec, us = divmod(time.time_ns() // 1000, 1_000_000)
+    cached_sec, prefix = _TS_CACHE
+    if sec != cached_sec:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        _TS_CACHE = (sec, prefix)
+    return f"{prefix}.{us:06d}Z"
+
+def _write_lines(lines: List[bytes]) -> None:
+    try:
+        _ensure_dir(ANALYTICS_PATH)
+        with open(ANALYTICS_PATH, "ab") as f:
+            f.write(b"\n".join(lines) + b"\n")
+    except OSError:
+        pass  # analytics is best-effort; never kill the flusher
+
+def _flush_loop() -> None:
+    """
+    Block for the first event, then gather more until the batch is full or the
+    flush interval elapses, and write them with a single append.
+    """
+    while True:
+        item = _QUEUE.get()
+        if item is _STOP:
+            return
+        batch = [item]
+        deadline = time.monotonic() + _FLUSH_INTERVAL_SEC
+        stop = False
+        while len(batch) < _FLUSH_MAX_EVENTS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = _QUEUE.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        _write_lines(batch)
+        if stop:
+            return
+
+def _ensure_flusher() -> None:
+    global _FLUSHER
+    if _FLUSHER is not None:
+        return
+    with _LOCK:
+        if _FLUSHER is None:
+            t = threading.Thread(target=_flush_loop, name="analytics-flusher", daemon=True)
+            t.start()
+            _FLUSHER = t
+
+@atexit.register
+def _flush_remaining() -> None:
+    """
+    Stop the flusher and write whatever is still queued. Only drains on this thread once
+    the flusher has exited; a flusher still busy (slow disk) keeps the queue to itself so
+    lines are never written by two threads at once.
+    """
+    global _FLUSHER
+    flusher = _FLUSHER
+    if flusher is not None:
+        try:
+            _QUEUE.put(_STOP, timeout=1.0)
+        except queue.Full:
+            return  # flusher is alive and still draining; it owns the rest
+        flusher.join(timeout=_EXIT_JOIN_SEC)
+        if flusher.is_alive():
+            return
+        # a later log_event starts a fresh flusher instead of queueing into a dead one
+        _FLUSHER = None
+    lines: List[bytes] = []
+    while True:
+        try:
+            item = _QUEUE.get_nowait()
+        except queue.Empty:
+            break
+        if item is not _STOP:
+            lines.append(item)
+    if lines:
+        _write_lines(lines)
+
 def log_event(event: Dict[str, Any]) -> None:
     """
-    Append a single JSON event to analytics file if enabled.
+    Queue a single JSON event for the analytics file if enabled.
+    Events are dropped (not blocked on) if the queue is full.
     """
     if not ANALYTICS_ENABLE:
         return
-    _ensure_dir(ANALYTICS_PATH)
     event = dict(event)
-    event["ts_iso"] = datetime.utcnow().isoformat() + "Z"
-    line = json.dumps(event, separators=(",", ":"), ensure_ascii=False)
-    with _LOCK:
-        with open(ANALYTICS_PATH, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
+    event["ts_iso"] = _utc_iso_now()
+    # orjson emits compact UTF-8 bytes directly (same shape as the old json.dumps call)
+    line = orjson.dumps(event, option=orjson.OPT_NON_STR_KEYS)
+    _ensure_flusher()
+    try:
+        _QUEUE.put_nowait(line)
+    except queue.Full:
+        pass
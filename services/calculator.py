@@ -1,15 +1,33 @@
 # services/calculator.py
-from typing import List, Dict, Any, Tuple
+import heapq
+import os
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Iterable, List, Dict, Any, Optional, Tuple
 
-# Simple global limits (guideline)
-MAX_HEIGHT_FEET = 13.5  # 13'6" guideline
-MAX_WEIGHT_LBS = 80000  # typical US GVW cap (varies by state/permit)
+__all__ = [
+    "MAX_HEIGHT_FEET",
+    "MAX_WEIGHT_LBS",
+    "UPPER_DECK_OFFSET_FT",
+    "SLOTS_LOWER",
+    "SLOTS_TOP",
+    "ALL_SLOTS",
+    "feet_to_meters",
+    "pounds_to_kg",
+    "calculate_load",
+    "suggest_arrangement",
+    "calculate_and_arrange",
+]
+
+# Simple global limits (guideline); override with DOT_MAX_HEIGHT_FEET / DOT_MAX_WEIGHT_LBS
+MAX_HEIGHT_FEET = float(os.getenv("DOT_MAX_HEIGHT_FEET", "13.5"))  # 13'6" guideline
+MAX_WEIGHT_LBS = float(os.getenv("DOT_MAX_WEIGHT_LBS", "80000"))   # typical US GVW cap (varies by state/permit)
 
 # Model the upper deck rail/tilt offset conservatively
 UPPER_DECK_OFFSET_FT = 2.5
 
-SLOTS_LOWER = ["LOWER_FRONT", "LOWER_MID1", "LOWER_MID2", "LOWER_REAR", "LOWER_TAIL"]
-SLOTS_TOP   = ["TOP_FRONT", "TOP_MID1", "TOP_MID2", "TOP_REAR"]
+SLOTS_LOWER = ("LOWER_FRONT", "LOWER_MID1", "LOWER_MID2", "LOWER_REAR", "LOWER_TAIL")
+SLOTS_TOP   = ("TOP_FRONT", "TOP_MID1", "TOP_MID2", "TOP_REAR")
 ALL_SLOTS   = SLOTS_LOWER + SLOTS_TOP
 
 
@@ -28,95 +46,156 @@ def calculate_load(
     trailer_height_ft: float,
     cars: List[Dict[str, Any]],
 ) -> Dict[str, Any]:
-    total_weight_lbs = truck_weight_lbs + trailer_weight_lbs + sum(c.get("weight_lbs", 0.0) for c in cars)
-    tallest_car_ft = max((c.get("height_ft", 0.0) for c in cars), default=0.0)
+    return _load_totals(
+        truck_weight_lbs,
+        trailer_weight_lbs,
+        trailer_height_ft,
+        ((c.get("height_ft"), c.get("weight_lbs")) for c in cars),
+    )
+
+
+def _load_totals(
+    truck_weight_lbs: float,
+    trailer_weight_lbs: float,
+    trailer_height_ft: float,
+    height_weight_pairs: Iterable[Tuple[Any, Any]],
+) -> Dict[str, Any]:
+    truck_weight_lbs = float(truck_weight_lbs or 0.0)
+    trailer_weight_lbs = float(trailer_weight_lbs or 0.0)
+    trailer_height_ft = float(trailer_height_ft or 0.0)
+
+    # one walk over the cars for both the weight sum and the tallest car
+    cars_weight_lbs = 0.0
+    tallest_car_ft = None
+    for h, w in height_weight_pairs:
+        cars_weight_lbs += float(w or 0.0)
+        h = float(h or 0.0)
+        if tallest_car_ft is None or h > tallest_car_ft:
+            tallest_car_ft = h
+    total_weight_lbs = truck_weight_lbs + trailer_weight_lbs + cars_weight_lbs
+    if tallest_car_ft is None:
+        tallest_car_ft = 0.0
 
     # naive overall height if everything were on a flat deck (not used for routing once we arrange)
     naive_total_height_ft = trailer_height_ft + tallest_car_ft
 
+    warnings: List[str] = []
+    if naive_total_height_ft > MAX_HEIGHT_FEET:
+        warnings.append(
+            f"Total height {naive_total_height_ft:.2f} ft exceeds DOT limit of {MAX_HEIGHT_FEET:.1f} ft."
+        )
+    if total_weight_lbs > MAX_WEIGHT_LBS:
+        warnings.append(
+            f"Total weight {total_weight_lbs:.0f} lbs exceeds DOT limit of {MAX_WEIGHT_LBS:.0f} lbs."
+        )
+
     return {
         "truck_weight_lbs": truck_weight_lbs,
         "trailer_weight_lbs": trailer_weight_lbs,
         "trailer_height_ft": trailer_height_ft,
         "total_weight_lbs": total_weight_lbs,
+        "total_height_ft": round(naive_total_height_ft, 2),
         "naive_total_height_ft": round(naive_total_height_ft, 2),
+        "warnings": warnings,
     }
 
 
 # ---------- Arrangement ----------
-def _loaded_height_for_slot(base_deck_ft: float, car_height_ft: float, is_upper: bool) -> float:
+_BY_HEIGHT_WEIGHT = itemgetter(0, 1)
+
+
+def _top_order(rec: Tuple[float, float, int]) -> Tuple[float, float]:
+    # shortest first; equal heights keep the heavier-first order of the lower-deck ranking
+    return rec[0], -rec[1]
+
+
+def _arrange_indices(heights: List[float], weights: List[float]) -> Tuple[List[int], List[int]]:
+    """
+    Numeric core of the arrangement, over parallel height/weight lists.
+    Returns (lower, upper) car indices in slot order:
+      lower: tallest first (heavier breaks ties), up to len(SLOTS_LOWER)
+      upper: the rest, shortest first, up to len(SLOTS_TOP)
+    """
+    # (height, weight, index) records; only the top-k per deck is selected, no full sorts.
+    # nlargest/nsmallest are stable, so ties resolve exactly as the sorted() slices did.
+    records = list(zip(heights, weights, range(len(heights))))
+    lower_recs = heapq.nlargest(len(SLOTS_LOWER), records, key=_BY_HEIGHT_WEIGHT)
+    taken = {r[2] for r in lower_recs}
+    rest = [r for r in records if r[2] not in taken]
+    upper_recs = heapq.nsmallest(len(SLOTS_TOP), rest, key=_top_order)
+    return [r[2] for r in lower_recs], [r[2] for r in upper_recs]
+
+
+@dataclass(slots=True)
+class SlotAssignment:
+    """One occupied slot. loaded_ft stays unrounded until to_dict()."""
+    car: Dict[str, Any]
+    loaded_ft: float
+    deck: str  # "LOWER" | "TOP"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "car": self.car,
+            "loaded_height_ft": round(self.loaded_ft, 2),
+            "deck": self.deck,
+        }
+
+
+def _car_columns(cars: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[float], List[float]]:
     """
-    Loaded height = deck height (+ upper deck offset) + car height.
-    We don't mutate car.height_ft; this returns per-slot loaded height.
+    Single walk over the caller's cars: private copies (we never mutate the caller's
+    dicts) plus parallel height/weight columns shared by totals and arrangement.
     """
-    if is_upper:
-        return base_deck_ft + UPPER_DECK_OFFSET_FT + car_height_ft
-    return base_deck_ft + car_height_ft
+    cars_copy: List[Dict[str, Any]] = []
+    heights: List[float] = []
+    weights: List[float] = []
+    for c in cars:
+        c = dict(c)
+        cars_copy.append(c)
+        heights.append(c.get("height_ft", 0.0))
+        weights.append(c.get("weight_lbs", 0.0))
+    return cars_copy, heights, weights
 
 
 def _greedy_arrange(
-    cars: List[Dict[str, Any]],
+    cars_copy: List[Dict[str, Any]],
+    heights: List[float],
+    weights: List[float],
     deck_ft: float,
-) -> Tuple[Dict[str, Dict[str, Any]], float, float]:
+) -> Tuple[List[Optional[SlotAssignment]], float, float]:
     """
     Place taller/heavier vehicles on LOWER first, shorter on TOP.
+    Takes the columns from _car_columns.
     Returns:
-      layout: { SLOT: { car: {...}, loaded_height_ft: float, deck: "LOWER"/"TOP" } }
+      assignments: one entry per ALL_SLOTS position (None if empty)
       lower_max_loaded_ft
       upper_max_loaded_ft
     """
-    cars_copy = [dict(c) for c in cars]  # don't mutate caller's cars
-
-    # Order: tallest first (breaking ties by heavier)
-    cars_sorted = sorted(
-        cars_copy,
-        key=lambda c: (c.get("height_ft", 0.0), c.get("weight_lbs", 0.0)),
-        reverse=True,
-    )
+    lower, upper = _arrange_indices(heights, weights)
 
-    layout: Dict[str, Dict[str, Any]] = {slot: None for slot in ALL_SLOTS}
+    # Loaded height = deck height (+ upper deck offset) + car height; car heights are never mutated.
+    assignments: List[Optional[SlotAssignment]] = [None] * len(ALL_SLOTS)
+    base_lower = deck_ft
+    base_upper = deck_ft + UPPER_DECK_OFFSET_FT
 
     lower_max = 0.0
     upper_max = 0.0
 
-    # 1) Fill LOWER first (up to 5 slots) with tallest
-    lower_i = 0
-    upper_i = 0
-    for car in cars_sorted:
-        if lower_i < len(SLOTS_LOWER):
-            slot = SLOTS_LOWER[lower_i]
-            lower_i += 1
-            loaded_h = _loaded_height_for_slot(deck_ft, car.get("height_ft", 0.0), is_upper=False)
-            layout[slot] = {
-                "car": car,
-                "loaded_height_ft": round(loaded_h, 2),
-                "deck": "LOWER",
-            }
-            if loaded_h > lower_max:
-                lower_max = loaded_h
-        else:
-            break
+    # 1) LOWER gets the tallest
+    for pos, i in enumerate(lower):
+        loaded_h = base_lower + heights[i]
+        assignments[pos] = SlotAssignment(cars_copy[i], loaded_h, "LOWER")
+        if loaded_h > lower_max:
+            lower_max = loaded_h
 
     # 2) Remaining cars → TOP from shortest to tallest (to minimize height)
-    remaining = cars_sorted[len(SLOTS_LOWER):]
-    remaining_sorted_top = sorted(remaining, key=lambda c: c.get("height_ft", 0.0))  # shortest first
-
-    for car in remaining_sorted_top:
-        if upper_i < len(SLOTS_TOP):
-            slot = SLOTS_TOP[upper_i]
-            upper_i += 1
-            loaded_h = _loaded_height_for_slot(deck_ft, car.get("height_ft", 0.0), is_upper=True)
-            layout[slot] = {
-                "car": car,
-                "loaded_height_ft": round(loaded_h, 2),
-                "deck": "TOP",
-            }
-            if loaded_h > upper_max:
-                upper_max = loaded_h
-        else:
-            break
-
-    return layout, round(lower_max, 2), round(upper_max, 2)
+    for pos, i in enumerate(upper, start=len(SLOTS_LOWER)):
+        loaded_h = base_upper + heights[i]
+        assignments[pos] = SlotAssignment(cars_copy[i], loaded_h, "TOP")
+        if loaded_h > upper_max:
+            upper_max = loaded_h
+
+    return assignments, round(lower_max, 2), round(upper_max, 2)
 
 
 def suggest_arrangement(
@@ -135,11 +214,22 @@ def suggest_arrangement(
       - arranged_cars: the cars we actually placed (original heights preserved)
       - warnings: list
     """
-    layout, lower_max_ft, upper_max_ft = _greedy_arrange(cars, deck_ft=trailer_height_ft)
+    cars_copy, heights, weights = _car_columns(cars)
+    arranged = _greedy_arrange(cars_copy, heights, weights, deck_ft=trailer_height_ft)
+    total_weight_lbs = truck_weight_lbs + trailer_weight_lbs + sum(weights)
+    return _arrangement_result(arranged, total_weight_lbs, max_height_ft, max_weight_lbs)
+
+
+def _arrangement_result(
+    arranged: Tuple[List[Optional[SlotAssignment]], float, float],
+    total_weight_lbs: float,
+    max_height_ft: float,
+    max_weight_lbs: float,
+) -> Dict[str, Any]:
+    assignments, lower_max_ft, upper_max_ft = arranged
     computed_max = max(lower_max_ft, upper_max_ft or 0.0)
 
     warnings: List[str] = []
-    total_weight_lbs = truck_weight_lbs + trailer_weight_lbs + sum(c.get("weight_lbs", 0.0) for c in cars)
     if total_weight_lbs > max_weight_lbs:
         warnings.append(
             f"Total weight {total_weight_lbs:.0f} lbs exceeds common GVW cap of {max_weight_lbs:.0f} lbs without permits."
@@ -149,7 +239,9 @@ def suggest_arrangement(
             f"Loaded height {computed_max:.2f} ft exceeds {max_height_ft:.1f} ft guideline. Consider moving taller cars to LOWER or reducing deck."
         )
 
-    arranged_cars = [v["car"] for k, v in layout.items() if v]
+    # dict-of-dict shape only at the boundary
+    layout = {slot: (a.to_dict() if a else None) for slot, a in zip(ALL_SLOTS, assignments)}
+    arranged_cars = [a.car for a in assignments if a]
 
     return {
         "layout": layout,
@@ -161,4 +253,23 @@ def suggest_arrangement(
         "computed_max_height_ft": round(computed_max, 2),
         "arranged_cars": arranged_cars,
         "warnings": warnings,
-    }
\ No newline at end of file
+    }
+
+
+def calculate_and_arrange(
+    truck_weight_lbs: float,
+    trailer_weight_lbs: float,
+    trailer_height_ft: float,
+    cars: List[Dict[str, Any]],
+    max_height_ft: float = MAX_HEIGHT_FEET,
+    max_weight_lbs: float = MAX_WEIGHT_LBS,
+) -> Dict[str, Any]:
+    """
+    calculate_load + suggest_arrangement off a single walk over `cars`.
+    Returns { totals: <calculate_load result>, arrangement: <suggest_arrangement result> }.
+    """
+    cars_copy, heights, weights = _car_columns(cars)
+    totals = _load_totals(truck_weight_lbs, trailer_weight_lbs, trailer_height_ft, zip(heights, weights))
+    arranged = _greedy_arrange(cars_copy, heights, weights, deck_ft=totals["trailer_height_ft"])
+    arrangement = _arrangement_result(arranged, totals["total_weight_lbs"], max_height_ft, max_weight_lbs)
+    return {"totals": totals, "arrangement": arrangement}
@@ -1,9 +1,17 @@
 # services/geocoding.py
 import os
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import requests
-from typing import Optional, Tuple, Dict, Any
+from requests.adapters import HTTPAdapter
+from typing import Optional, Tuple, Dict, Any, Iterable, List
 from dotenv import load_dotenv
+import orjson
+
+from services.persistent_cache import PersistentCache
 
 # Load env for local dev; in production rely on host envs
 load_dotenv()
@@ -11,6 +19,12 @@ load_dotenv()
 HERE_API_KEY = os.getenv("HERE_API_KEY")
 GEOCODE_DEBUG = os.getenv("GEOCODE_DEBUG", "0") == "1"
 
+# Optional on-disk cache of HERE answers so recurring addresses survive restarts/redeploys
+GEOCODE_CACHE_ENABLE = os.getenv("GEOCODE_CACHE_ENABLE", "0") == "1"
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "geocache.sqlite"))
+GEOCODE_CACHE_MAX_AGE_DAYS = float(os.getenv("GEOCODE_CACHE_MAX_AGE_DAYS", "90"))
+_DISK_CACHE = PersistentCache(GEOCODE_CACHE_PATH, "geocode", GEOCODE_CACHE_MAX_AGE_DAYS) if GEOCODE_CACHE_ENABLE else None
+
 MODULE_VERSION = "geocode-2025-08-31-qq-fallback-usa-us-nofilter"
 if GEOCODE_DEBUG:
     print(f"[GEOCODE] MODULE {MODULE_VERSION} (key_loaded={'yes' if HERE_API_KEY else 'no'})")
@@ -18,26 +32,56 @@ if GEOCODE_DEBUG:
 # -----------------------------
 # Patterns & helpers
 # -----------------------------
-_LATLNG_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
 # "Baltimore, MD" | "New York, NY" | optional trailing ", USA"
 _CITY_STATE_RE = re.compile(r"^\s*([A-Za-z .'-]+)\s*,\s*([A-Za-z]{2})(?:\s*,\s*USA)?\s*$")
+# bound once; runs on every geocode call
+_CITY_STATE_MATCH = _CITY_STATE_RE.match
+# HERE structured query for 'City, ST'
+_QQ = "city={};state={};country=USA".format
+
+# One pooled keep-alive session for all HERE geocode calls (skips a TLS handshake per lookup)
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+_SESSION.headers.update({"User-Agent": "carhauler-backend"})
 
 def _dbg(*args):
     if GEOCODE_DEBUG:
         print("[GEOCODE]", *args)
 
-def _try_parse_latlng(text: str) -> Optional[Tuple[float, float]]:
-    if not isinstance(text, str):
-        return None
-    m = _LATLNG_RE.match(text)
-    if not m:
+# Freeform country filters, preferred first. Most HERE tenants answer USA and US alike;
+# if the alternate keeps succeeding right after the preferred one missed, promote it so
+# the common path costs one HTTP call instead of two.
+_COUNTRY_FILTERS: Tuple[str, str] = ("countryCode:USA", "countryCode:US")
+_FILTER_SWAP_AFTER = 3
+_ALT_FILTER_WINS = 0
+_FILTER_LOCK = threading.Lock()
+
+def _record_filter_win(in_filter: str) -> None:
+    global _COUNTRY_FILTERS, _ALT_FILTER_WINS
+    with _FILTER_LOCK:
+        preferred, alternate = _COUNTRY_FILTERS
+        if in_filter == preferred:
+            _ALT_FILTER_WINS = 0
+        elif in_filter == alternate:
+            _ALT_FILTER_WINS += 1
+            if _ALT_FILTER_WINS >= _FILTER_SWAP_AFTER:
+                _COUNTRY_FILTERS = (alternate, preferred)
+                _ALT_FILTER_WINS = 0
+                _dbg("Preferring country filter", alternate)
+
+def parse_latlng(text: str) -> Optional[Tuple[float, float]]:
+    """Return (lat,lng) if text looks like 'lat,lng'. Shared with main._resolve_place."""
+    # split + float is all C-level, no regex needed; float() tolerates the surrounding spaces
+    if not isinstance(text, str) or "," not in text:
         return None
+    a, b = text.split(",", 1)
     try:
-        lat = float(m.group(1)); lng = float(m.group(2))
-        if -90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0:
-            return (lat, lng)
-    except Exception:
-        pass
+        lat = float(a); lng = float(b)
+    except ValueError:
+        return None
+    # the range checks also reject nan/inf
+    if -90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0:
+        return (lat, lng)
     return None
 
 def _looks_like_ocean(lat: float, lng: float) -> bool:
@@ -59,6 +103,14 @@ def _call_here(params: Dict[str, Any], timeout_sec: float) -> Optional[Tuple[flo
     if not HERE_API_KEY:
         _dbg("Missing HERE_API_KEY")
         return None
+    cache_key = None
+    if _DISK_CACHE is not None:
+        # apiKey is never part of the key (or written to disk)
+        cache_key = "&".join(f"{k}={params[k]}" for k in sorted(params))
+        hit = _DISK_CACHE.get(cache_key)
+        if hit is not None:
+            _dbg("DISK CACHE HIT", cache_key)
+            return (hit[0], hit[1], hit[2])
     url = "https://geocode.search.hereapi.com/v1/geocode"
     p = dict(params)
     p["apiKey"] = HERE_API_KEY
@@ -66,11 +118,11 @@ def _call_here(params: Dict[str, Any], timeout_sec: float) -> Optional[Tuple[flo
     _dbg("REQUEST", {"url": url, "params": p})
 
     try:
-        resp = requests.get(url, params=p, timeout=timeout_sec)
+        resp = _SESSION.get(url, params=p, timeout=timeout_sec)
         if 400 <= resp.status_code < 500:
             _dbg(f"HTTP {resp.status_code} BODY:", resp.text[:600])
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
     except Exception as e:
         _dbg("HTTP error:", e)
         return None
@@ -88,57 +140,73 @@ def _call_here(params: Dict[str, Any], timeout_sec: float) -> Optional[Tuple[flo
         _dbg("Missing/invalid position in HERE response")
         return None
     label = best.get("title") or (best.get("address") or {}).get("label") or (p.get("q") or p.get("qq") or "")
+    if cache_key is not None:
+        _DISK_CACHE.set(cache_key, [lat, lng, label])
     return (lat, lng, label)
 
+@lru_cache(maxsize=1024)
+def _call_here_city_state_cached(city: str, st: str, timeout_sec: float) -> Tuple[float, float, str]:
+    ans = _call_here({"qq": _QQ(city, st), "limit": 1}, timeout_sec)
+    if ans is None:
+        raise _GeocodeMiss(f"{city}, {st}")
+    return ans
+
+def _call_here_city_state(city: str, st: str, timeout_sec: float) -> Optional[Tuple[float, float, str]]:
+    """qq lookup for a (city, ST) pair, shared by both ladders; misses are not memoized."""
+    try:
+        return _call_here_city_state_cached(city, st, timeout_sec)
+    except _GeocodeMiss:
+        return None
+
 # -----------------------------
-# Public API
+# Geocode ladders (uncached; see Public API below)
 # -----------------------------
-def geocode_address(query: str, *, timeout_sec: float = 10.0) -> Optional[Tuple[float, float]]:
+def _geocode_address_uncached(query: str, timeout_sec: float) -> Optional[Tuple[float, float]]:
     """
-    Geocode a free-form address or 'lat,lng' to (lat,lng).
     Order of attempts:
       0) 'lat,lng' direct
       1) If looks like 'City, ST': use qq=city=City;state=ST;country=USA
-      2) q=... with in=countryCode:USA
-      3) q=... with in=countryCode:US
+      2) q=... with the preferred filter (in=countryCode:USA, or :US once that keeps winning)
+      3) q=... with the other filter
       4) q=... with no 'in'
-    Returns None if all fail or result looks bogus.
     """
     # 0) Allow explicit lat,lng
-    direct = _try_parse_latlng(query)
+    direct = parse_latlng(query)
     if direct is not None:
         _dbg("Parsed lat,lng directly:", direct)
         return direct
 
     # 1) Structured City,ST -> qq
-    m = _CITY_STATE_RE.match(query)
+    m = _CITY_STATE_MATCH(query)
     if m:
         city = m.group(1).strip()
         st = m.group(2).strip().upper()
         # HERE prefers qq for structured address pieces
-        params = {"qq": f"city={city};state={st};country=USA", "limit": 1}
-        ans = _call_here(params, timeout_sec)
+        ans = _call_here_city_state(city, st, timeout_sec)
         if ans:
             lat, lng, _ = ans
             if not _looks_like_ocean(lat, lng) and _is_reasonable_us_coordinate(lat, lng):
                 return (lat, lng)
             _dbg("qq City,ST result looked invalid, will try freeform")
 
-    # 2) Freeform with USA (ISO-3)
-    ans = _call_here({"q": query, "limit": 1, "in": "countryCode:USA"}, timeout_sec)
+    # 2) Freeform with the preferred country filter (USA ISO-3 unless US has been winning)
+    preferred, alternate = _COUNTRY_FILTERS
+    ans = _call_here({"q": query, "limit": 1, "in": preferred}, timeout_sec)
     if ans:
         lat, lng, _ = ans
         if not _looks_like_ocean(lat, lng) and _is_reasonable_us_coordinate(lat, lng):
+            _record_filter_win(preferred)
             return (lat, lng)
-        _dbg("USA-filter result looked invalid; will try US")
+        _dbg(f"{preferred} result looked invalid; will try {alternate}")
 
-    # 3) Freeform with US (ISO-2) — some tenants prefer this
-    ans = _call_here({"q": query, "limit": 1, "in": "countryCode:US"}, timeout_sec)
+    # 3) Freeform with the other filter — some tenants prefer US (ISO-2)
+    ans = _call_here({"q": query, "limit": 1, "in": alternate}, timeout_sec)
     if ans:
         lat, lng, _ = ans
         if not _looks_like_ocean(lat, lng) and _is_reasonable_us_coordinate(lat, lng):
+            _record_filter_win(alternate)
             return (lat, lng)
-        _dbg("US-filter result looked invalid; will drop filter")
+        _dbg(f"{alternate} result looked invalid; will drop filter")
 
     # 4) Freeform with no filter
     ans = _call_here({"q": query, "limit": 1}, timeout_sec)
@@ -151,27 +219,24 @@ def geocode_address(query: str, *, timeout_sec: float = 10.0) -> Optional[Tuple[
     return None
 
 
-def geocode_with_label(query: str, *, timeout_sec: float = 10.0) -> Optional[Tuple[Tuple[float, float], str]]:
-    """
-    Same as geocode_address, but returns ((lat,lng), label) or None.
-    """
-    direct = _try_parse_latlng(query)
+def _geocode_with_label_uncached(query: str, timeout_sec: float) -> Optional[Tuple[Tuple[float, float], str]]:
+    direct = parse_latlng(query)
     if direct is not None:
         return direct, f"{direct[0]:.6f},{direct[1]:.6f}"
 
     # Try qq if City,ST
-    m = _CITY_STATE_RE.match(query)
+    m = _CITY_STATE_MATCH(query)
     if m:
         city = m.group(1).strip()
         st = m.group(2).strip().upper()
-        ans = _call_here({"qq": f"city={city};state={st};country=USA", "limit": 1}, timeout_sec)
+        ans = _call_here_city_state(city, st, timeout_sec)
         if ans:
             lat, lng, label = ans
             if not _looks_like_ocean(lat, lng) and _is_reasonable_us_coordinate(lat, lng):
                 return ( (lat, lng), label )
 
-    # Freeform ladder: USA -> US -> none
-    for in_filter in ("countryCode:USA", "countryCode:US", None):
+    # Freeform ladder: preferred filter -> alternate -> none
+    for in_filter in (*_COUNTRY_FILTERS, None):
         params = {"q": query, "limit": 1}
         if in_filter:
             params["in"] = in_filter
@@ -179,6 +244,104 @@ def geocode_with_label(query: str, *, timeout_sec: float = 10.0) -> Optional[Tup
         if ans:
             lat, lng, label = ans
             if not _looks_like_ocean(lat, lng) and (in_filter is None or _is_reasonable_us_coordinate(lat, lng)):
+                if in_filter:
+                    _record_filter_win(in_filter)
                 return ( (lat, lng), label )
 
     return None
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+class _GeocodeMiss(Exception):
+    """Raised inside an lru_cache'd call so misses are never memoized (lru_cache skips exceptions)."""
+
+def _norm_query(query: str) -> str:
+    # HERE matching is case/whitespace-insensitive, so fold those into one cache key
+    return " ".join(query.split()).lower()
+
+class _QueryCache:
+    """
+    Bounded LRU of successful lookups keyed on (_norm_query(query), timeout).
+    Only the key is normalized: the ladder always runs on the text the caller passed,
+    so a hit returns whatever the first spelling of that query resolved to.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[str, float], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, fn, query: str, timeout_sec: float):
+        key = (_norm_query(query), timeout_sec)
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+                return hit
+        ans = fn(query, timeout_sec)
+        if ans is not None:  # misses are not memoized
+            with self._lock:
+                self._data[key] = ans
+                self._data.move_to_end(key)
+                if len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return ans
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+_ADDRESS_CACHE = _QueryCache(maxsize=4096)
+_LABEL_CACHE = _QueryCache(maxsize=4096)
+
+def geocode_address(query: str, *, timeout_sec: float = 10.0) -> Optional[Tuple[float, float]]:
+    """
+    Geocode a free-form address or 'lat,lng' to (lat,lng).
+    Tries 'lat,lng', then HERE qq for 'City, ST', then freeform q with USA/US/no filter.
+    Successful results are memoized per normalized query.
+    Returns None if all fail or result looks bogus.
+    """
+    return _ADDRESS_CACHE.lookup(_geocode_address_uncached, query, timeout_sec)
+
+def geocode_with_label(query: str, *, timeout_sec: float = 10.0) -> Optional[Tuple[Tuple[float, float], str]]:
+    """
+    Same as geocode_address, but returns ((lat,lng), label) or None.
+    """
+    return _LABEL_CACHE.lookup(_geocode_with_label_uncached, query, timeout_sec)
+
+def geocode_many(
+    queries: Iterable[str], *, max_workers: int = 8, timeout_sec: float = 10.0
+) -> List[Optional[Tuple[float, float]]]:
+    """
+    geocode_address over many stops concurrently (threads share the pooled _SESSION).
+    Results line up with `queries`; repeats of a query (after _norm_query) are looked up
+    once, and a query that fails or errors yields None without stopping the rest.
+    Mind HERE's per-tenant rate limit (about 5 req/s on freemium plans) when raising
+    max_workers; each query may cost up to 4 HERE calls.
+    """
+    queries = list(queries)
+    # first spelling of each normalized query is the one sent (see _QueryCache)
+    distinct: Dict[str, str] = {}
+    for q in queries:
+        distinct.setdefault(_norm_query(q), q)
+
+    def _one(q: str) -> Optional[Tuple[float, float]]:
+        try:
+            return geocode_address(q, timeout_sec=timeout_sec)
+        except Exception as e:
+            _dbg("geocode_many error for", q, e)
+            return None
+
+    todo = list(distinct.values())
+    if len(todo) <= 1 or max_workers <= 1:
+        found = [_one(q) for q in todo]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(todo))) as ex:
+            found = list(ex.map(_one, todo))
+    by_key = dict(zip(distinct, found))
+    return [by_key[_norm_query(q)] for q in queries]
+
+geocode_address.cache_clear = _ADDRESS_CACHE.cache_clear
+geocode_with_label.cache_clear = _LABEL_CACHE.cache_clear
@@ -8,17 +8,23 @@ This module includes a minimal helper to search makes/models so you can
 autocomplete, but expect missing specs and fall back to manual entry.
 """
 import requests
+from requests.adapters import HTTPAdapter
 
 BASE_URL = "https://vpic.nhtsa.dot.gov/api/vehicles"
 
+# Reused keep-alive connection to vPIC for autocomplete bursts
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+_SESSION.headers.update({"User-Agent": "carhauler-backend"})
+
 def search_models(make: str, year: int):
     url = f"{BASE_URL}/GetModelsForMakeYear/make/{make}/modelyear/{year}?format=json"
-    r = requests.get(url, timeout=20)
+    r = _SESSION.get(url, timeout=20)
     r.raise_for_status()
     return r.json().get("Results", [])
 
 def makes():
     url = f"{BASE_URL}/getallmakes?format=json"
-    r = requests.get(url, timeout=20)
+    r = _SESSION.get(url, timeout=20)
     r.raise_for_status()
     return r.json().get("Results", [])
@@ -0,0 +1,64 @@
+# services/persistent_cache.py
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+import orjson
+
+
+class PersistentCache:
+    """
+    Small SQLite key/value store for slow external lookups that should survive restarts.
+    Values are stored as JSON; entries older than max_age_days read as missing.
+    Best-effort: any SQLite/filesystem error behaves like a cache miss.
+    """
+
+    def __init__(self, path: str, table: str, max_age_days: float = 90.0):
+        self.path = path
+        self.table = table
+        self.max_age_sec = max_age_days * 86400.0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # opened lazily so importing a service never touches the disk
+        if self._conn is None:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(k TEXT PRIMARY KEY, v BLOB NOT NULL, ts REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    f"SELECT v, ts FROM {self.table} WHERE k = ?", (key,)
+                ).fetchone()
+        except (sqlite3.Error, OSError):
+            return None
+        if row is None or time.time() - row[1] > self.max_age_sec:
+            return None
+        return orjson.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            blob = orjson.dumps(value)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (k, v, ts) VALUES (?, ?, ?)",
+                    (key, blob, time.time()),
+                )
+                conn.commit()
+        except (sqlite3.Error, OSError):
+            pass
@@ -0,0 +1,59 @@
+# services/polyline.py
+# HERE Flexible Polyline decoder. Standard library only: tools/plan_route_to_geojson.py
+# loads this file by path, so keep it free of other backend imports.
+from itertools import accumulate
+from typing import List, Tuple
+
+# Spec: https://github.com/heremaps/flexible-polyline
+_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+# byte -> 6-bit value, 0xFF for bytes outside the alphabet
+_VAL_TABLE = bytes(_ALPHABET.index(chr(c)) if chr(c) in _ALPHABET else 0xFF for c in range(256))
+
+def decode_flexible_polyline(encoded: str) -> List[Tuple[float, float]]:
+    """Decode HERE Flexible Polyline to list of (lat, lng)."""
+    if not encoded:
+        return []
+    try:
+        b = encoded.encode("ascii")
+    except UnicodeEncodeError as e:
+        raise ValueError(f"Invalid flexible polyline char: {e.object[e.start]!r}") from None
+
+    # pass 1: the whole varint stream (5 payload bits per char, 0x20 = continuation), inlined
+    table = _VAL_TABLE
+    vals: List[int] = []
+    append = vals.append
+    result = 0
+    shift = 0
+    for c in b:
+        val = table[c]
+        if val == 0xFF:
+            raise ValueError(f"Invalid flexible polyline char: {chr(c)!r}")
+        result |= (val & 0x1f) << shift
+        if val & 0x20:
+            shift += 5
+        else:
+            append(result)
+            result = 0
+            shift = 0
+    # stream starts with the format version, then the header varint
+    if vals and vals[0] != 1:
+        raise ValueError(f"Invalid flexible polyline: unsupported version {vals[0]}")
+    if shift or len(vals) < 2:
+        raise ValueError("Invalid flexible polyline: truncated varint")
+    header = vals[1]
+    precision = header & 15
+    third_dim = (header >> 4) & 7
+    third_dim_prec = (header >> 7) & 15  # noqa: F841
+
+    scale = 10 ** precision
+    stride = 3 if third_dim != 0 else 2  # 3rd dimension is read but ignored
+    if (len(vals) - 2) % stride:
+        raise ValueError("Invalid flexible polyline: truncated varint")
+
+    # pass 2: zigzag inline ((v >> 1) ^ -(v & 1)) + running sums per column
+    lats = accumulate((v >> 1) ^ -(v & 1) for v in vals[2::stride])
+    lngs = accumulate((v >> 1) ^ -(v & 1) for v in vals[3::stride])
+    pts = ((la / scale, lo / scale) for la, lo in zip(lats, lngs))
+
+    # Filter invalid points (callers rely on this; no need to re-check the decoded path)
+    return [p for p in pts if -90.0 <= p[0] <= 90.0 and -180.0 <= p[1] <= 180.0]
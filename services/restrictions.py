@@ -1,11 +1,12 @@
 # services/restrictions.py
+import threading
 from dataclasses import dataclass
 from typing import List, Tuple, Dict, Optional
-import json
 from pathlib import Path
-from functools import lru_cache
 
-@dataclass
+import orjson
+
+@dataclass(frozen=True, slots=True)
 class Facility:
     name: str
     kind: str  # "tunnel" | "bridge" | ...
@@ -19,43 +20,124 @@ def point_in_bbox(lat: float, lng: float, bbox: Tuple[float, float, float, float
     s, w, n, e = bbox
     return (s <= lat <= n) and (w <= lng <= e)
 
-@lru_cache(maxsize=4)
+# (resolved path, st_mtime_ns) -> parsed facilities; editing the file invalidates its entry.
+# One lock covers check, parse and store: concurrent cold misses load the file once.
+_FAC_CACHE: Dict[Tuple[str, int], List[Facility]] = {}
+_FAC_LOCK = threading.Lock()
+
 def load_facilities(path: str) -> List[Facility]:
     p = Path(path)
-    if not p.exists():
-        raise FileNotFoundError(f"Facilities file not found: {p}")
-    raw = json.loads(p.read_text(encoding="utf-8"))
-    facs: List[Facility] = []
-    for f in raw.get("facilities", []):
-        facs.append(
-            Facility(
-                name=f["name"],
-                kind=f["kind"],
-                bbox=tuple(f["bbox"]),
-                min_height_ft=float(f["min_height_ft"]),
-                notes=f.get("notes", ""),
-                avoid_area_param=f["avoid_area_param"],
-                via=f.get("via"),
+    try:
+        mtime_ns = p.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Facilities file not found: {p}") from None
+    key = (str(p.resolve()), mtime_ns)
+    with _FAC_LOCK:
+        cached = _FAC_CACHE.get(key)
+        if cached is not None:
+            return cached
+        raw = orjson.loads(p.read_bytes())
+        facs: List[Facility] = []
+        for f in raw.get("facilities", []):
+            facs.append(
+                Facility(
+                    name=f["name"],
+                    kind=f["kind"],
+                    bbox=tuple(f["bbox"]),
+                    min_height_ft=float(f["min_height_ft"]),
+                    notes=f.get("notes", ""),
+                    avoid_area_param=f["avoid_area_param"],
+                    via=f.get("via"),
+                )
             )
-        )
+        # keep only the current version of each file
+        for k in [k for k in _FAC_CACHE if k[0] == key[0]]:
+            del _FAC_CACHE[k]
+        _FAC_CACHE[key] = facs
     return facs
 
+def _clear_facilities_cache() -> None:
+    with _FAC_LOCK:
+        _FAC_CACHE.clear()
+
+load_facilities.cache_clear = _clear_facilities_cache
+
+# Grid index for the polyline scan: ~11 km cells. Facilities spanning more cells than
+# _GRID_MAX_CELLS (rare, very large boxes) are tested point-by-point instead.
+_GRID_DEG = 0.1
+_GRID_MAX_CELLS = 400
+
+def _grid_index(
+    facilities: List[Facility],
+    route_bbox: Tuple[float, float, float, float],
+) -> Tuple[Dict[Tuple[int, int], List[int]], List[int]]:
+    """
+    Buckets facility indices by the grid cells their bbox covers.
+    Facilities that don't overlap route_bbox (S, W, N, E) are left out entirely.
+    Returns (cell -> facility indices, indices too large to bucket).
+    """
+    r_s, r_w, r_n, r_e = route_bbox
+    grid: Dict[Tuple[int, int], List[int]] = {}
+    wide: List[int] = []
+    for i, fac in enumerate(facilities):
+        s, w, n, e = fac.bbox
+        if s > r_n or n < r_s or w > r_e or e < r_w:
+            continue
+        rows = range(int(s // _GRID_DEG), int(n // _GRID_DEG) + 1)
+        cols = range(int(w // _GRID_DEG), int(e // _GRID_DEG) + 1)
+        if len(rows) * len(cols) > _GRID_MAX_CELLS:
+            wide.append(i)
+            continue
+        for row in rows:
+            for col in cols:
+                grid.setdefault((row, col), []).append(i)
+    return grid, wide
+
 def scan_polyline_against_facilities(
     coords: List[Tuple[float, float]],
     facilities: List[Facility],
-    max_height_ft: float
+    max_height_ft: float,
+    conflicts_only: bool = False,
 ) -> List[Dict]:
     """
     Returns list of hits with conflict flag:
     [{'facility': Facility, 'conflict': True/False}]
+    Hits keep the order of `facilities`.
+    conflicts_only=True skips facilities the vehicle clears (every hit is then a conflict).
     """
     hits: List[Dict] = []
     if not coords:
         return hits
-    for fac in facilities:
-        if any(point_in_bbox(lat, lon, fac.bbox) for (lat, lon) in coords):
-            hits.append({
-                "facility": fac,
-                "conflict": (max_height_ft > fac.min_height_ft)
-            })
-    return hits
\ No newline at end of file
+    if conflicts_only:
+        facilities = [f for f in facilities if max_height_ft > f.min_height_ft]
+        if not facilities:
+            return hits
+    lats = [c[0] for c in coords]
+    lngs = [c[1] for c in coords]
+    grid, wide = _grid_index(facilities, (min(lats), min(lngs), max(lats), max(lngs)))
+
+    # each point only looks at the facilities bucketed in its own cell
+    matched = set()
+    if grid:
+        for lat, lon in coords:
+            cell = grid.get((int(lat // _GRID_DEG), int(lon // _GRID_DEG)))
+            if not cell:
+                continue
+            for i in cell:
+                if i in matched:
+                    continue
+                s, w, n, e = facilities[i].bbox
+                if s <= lat <= n and w <= lon <= e:
+                    matched.add(i)
+    for i in wide:
+        s, w, n, e = facilities[i].bbox
+        if any(s <= lat <= n and w <= lon <= e for (lat, lon) in coords):
+            matched.add(i)
+
+    for i in sorted(matched):
+        fac = facilities[i]
+        hits.append({
+            "facility": fac,
+            "conflict": (max_height_ft > fac.min_height_ft)
+        })
+    return hits
@@ -1,12 +1,63 @@
 # services/routing.py
 import os
 import math
-import json
+import re
+import threading
+import time
 import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Any, Dict, List, Optional, Tuple, Union
 
+import orjson
+
+from services.polyline import decode_flexible_polyline
+
 HERE_API_KEY = os.getenv("HERE_API_KEY")
 
+class _CappedRetry(Retry):
+    """
+    Retry whose sleeps are bounded: HERE can send Retry-After values of minutes on 429,
+    and honouring them verbatim would pin a request (and its worker thread) that long.
+    """
+    MAX_SLEEP_SEC = 4.0
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, self.MAX_SLEEP_SEC)
+
+    def get_backoff_time(self) -> float:
+        return min(super().get_backoff_time(), self.MAX_SLEEP_SEC)
+
+# Pooled keep-alive session for HERE routing; the fallback finder fires dozens of
+# requests per plan, so reusing TLS connections matters. Throttling (429, honouring
+# Retry-After up to _CappedRetry.MAX_SLEEP_SEC) and transient 5xx are retried with
+# backoff; the last response is returned.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=_CappedRetry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    ),
+))
+_SESSION.headers.update({"User-Agent": "carhauler-backend"})
+
+# Runs only each plan's primary route call (the alternative runs on the caller's thread).
+# Nothing else is queued here, so a primary never waits behind fallback probes.
+_PRIMARY_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="here-primary")
+
+# Probes in flight per fallback search. Kept below the bearing count: later bearings are
+# only sent while earlier ones are still unanswered, so an early hit saves HERE quota.
+_RING_FANOUT = 4
+
 # ----------------- unit helpers -----------------
 def feet_to_meters(ft: float) -> float:
     return ft * 0.3048
@@ -34,6 +85,24 @@ def offset_point(lat: float, lng: float, distance_m: float, bearing_deg: float)
                              math.cos(distance_m/R)-math.sin(lat1)*math.sin(lat2))
     return (math.degrees(lat2), math.degrees(lon2))
 
+def _ring_offsets(lat: float, lng: float, distance_m: float,
+                  bearing_trig: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """
+    offset_point for many bearings at one distance. bearing_trig holds (sin, cos) per bearing,
+    so the per-ring trig (distance, origin latitude) is computed once instead of per bearing.
+    """
+    R = 6371000.0
+    lat1 = math.radians(lat)
+    lon1 = math.radians(lng)
+    sin_lat1 = math.sin(lat1); cos_lat1 = math.cos(lat1)
+    sin_d = math.sin(distance_m/R); cos_d = math.cos(distance_m/R)
+    out = []
+    for sin_b, cos_b in bearing_trig:
+        lat2 = math.asin(sin_lat1*cos_d + cos_lat1*sin_d*cos_b)
+        lon2 = lon1 + math.atan2(sin_b*sin_d*cos_lat1, cos_d-sin_lat1*math.sin(lat2))
+        out.append((math.degrees(lat2), math.degrees(lon2)))
+    return out
+
 def _float_pair(xy: Union[Tuple[Any, Any], List[Any], str]) -> Tuple[float, float]:
     """Normalize a coordinate pair to (lat: float, lng: float)."""
     if isinstance(xy, str):
@@ -45,68 +114,13 @@ def _float_pair(xy: Union[Tuple[Any, Any], List[Any], str]) -> Tuple[float, floa
         return (float(xy[0]), float(xy[1]))
     raise ValueError(f"Unsupported coordinate format: {xy!r}")
 
-# ----------------- HERE Flexible Polyline (spec-correct) -----------------
-# Spec: https://github.com/heremaps/flexible-polyline
-_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
-_CHAR_TO_VAL = {c: i for i, c in enumerate(_ALPHABET)}
-
-def _read_varint(s: str, idx: int):
-    result = 0
-    shift = 0
-    while True:
-        if idx >= len(s):
-            raise ValueError("Invalid flexible polyline: truncated varint")
-        ch = s[idx]
-        if ch not in _CHAR_TO_VAL:
-            raise ValueError(f"Invalid flexible polyline char: {ch!r}")
-        val = _CHAR_TO_VAL[ch]
-        idx += 1
-        result |= (val & 0x1f) << shift
-        if (val & 0x20) == 0:
-            break
-        shift += 5
-    return result, idx
-
-def _zigzag_decode(n: int) -> int:
-    return (n >> 1) ^ (-(n & 1))
-
-def decode_flexible_polyline(encoded: str) -> List[Tuple[float, float]]:
-    """Decode HERE Flexible Polyline to list of (lat, lng)."""
-    if not encoded:
-        return []
-    idx = 0
-    header, idx = _read_varint(encoded, idx)
-    precision = header & 15
-    third_dim = (header >> 4) & 7
-    third_dim_prec = (header >> 7) & 15  # noqa: F841
-
-    scale = 10 ** precision
-    has_z = (third_dim != 0)
-
-    lat = 0
-    lng = 0
-    out: List[Tuple[float, float]] = []
-
-    while idx < len(encoded):
-        dlat, idx = _read_varint(encoded, idx)
-        dlng, idx = _read_varint(encoded, idx)
-        lat += _zigzag_decode(dlat)
-        lng += _zigzag_decode(dlng)
-        if has_z:
-            dz, idx = _read_varint(encoded, idx)  # ignore 3rd dimension
-            _ = _zigzag_decode(dz)
-        out.append((lat / scale, lng / scale))
-
-    # Filter invalid points
-    return [(la, lo) for (la, lo) in out if -90.0 <= la <= 90.0 and -180.0 <= lo <= 180.0]
-
 # ----------------- optional facilities (blockers) -----------------
 def load_facilities(fpath: Optional[str]) -> List[Dict[str, Any]]:
     if not fpath:
         return []
     try:
-        with open(fpath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(fpath, "rb") as f:
+            data = orjson.loads(f.read())
         if isinstance(data, list):
             return data
         return data.get("items", [])
@@ -118,25 +132,44 @@ def detect_blockers_near(dest: Tuple[float, float], facilities: List[Dict[str, A
     if not facilities:
         return blockers
     dlat, dlng = dest
+    # destination-side haversine terms are the same for every facility; compute them once
+    R = 6371000.0
+    cos_phi1 = math.cos(math.radians(dlat))
     for it in facilities:
         try:
             lat = float(it.get("lat"))
             lng = float(it.get("lng"))
             radius = float(it.get("radius_m", 500))
             name = str(it.get("name") or "facility")
-            dist = haversine_m(dlat, dlng, lat, lng)
+            dphi = math.radians(lat - dlat)
+            dlmb = math.radians(lng - dlng)
+            a = math.sin(dphi/2)**2 + cos_phi1*math.cos(math.radians(lat))*math.sin(dlmb/2)**2
+            dist = R*2*math.atan2(math.sqrt(a), math.sqrt(1-a))
             if dist <= within_m + radius:
                 blockers.append(name)
+                if len(blockers) == 10:
+                    break
         except Exception:
             continue
-    return blockers[:10]
+    return blockers
 
 # ----------------- HERE routing calls -----------------
+@dataclass(frozen=True, slots=True)
+class VehicleParams:
+    """
+    HERE v8 truck query params, built once per plan and shared by every route call.
+    Frozen/hashable, so it keys the route cache as-is.
+    """
+    items: Tuple[Tuple[str, Any], ...]
+
+    def to_query_dict(self) -> Dict[str, Any]:
+        return dict(self.items)
+
 def _build_vehicle_params(height_m: float, weight_kg: float,
                           length_m: Optional[float], width_m: Optional[float],
                           weight_per_axle_kg: Optional[float],
                           shipped_hazardous_goods: Optional[str],
-                          tunnel_category: Optional[str]) -> Dict[str, Any]:
+                          tunnel_category: Optional[str]) -> VehicleParams:
     """
     Build query params for HERE v8. We request notices/spans (if allowed) to surface violations.
     """
@@ -163,21 +196,66 @@ def _build_vehicle_params(height_m: float, weight_kg: float,
         p["vehicle[tunnelCategory]"] = tunnel_category
     # 'tunnels' is not a valid avoid feature in v8; keep "difficultTurns" bias
     p["avoid[features]"] = "difficultTurns"
-    return p
+    return VehicleParams(tuple(p.items()))
+
+# Short-lived cache of successful HERE route responses. Re-planning the same load (and the
+# fallback finder's probes) otherwise repeats identical calls. Coordinates are rounded to
+# 5 decimals (~1 m). Cached "raw" payloads are shared between callers: treat as read-only.
+_ROUTE_CACHE_TTL_SEC = 600.0
+_ROUTE_CACHE_MAX = 4096
+_ROUTE_CACHE: Dict[Tuple, Tuple[float, Dict[str, Any]]] = {}
+_ROUTE_CACHE_LOCK = threading.Lock()
+
+def _route_cache_key(origin: Tuple[float, float], dest: Tuple[float, float],
+                     vehicle_params: VehicleParams,
+                     via: Optional[Tuple[float, float]]) -> Tuple:
+    return (
+        round(origin[0], 5), round(origin[1], 5),
+        round(dest[0], 5), round(dest[1], 5),
+        (round(via[0], 5), round(via[1], 5)) if via else None,
+        vehicle_params,
+    )
 
 def _call_here_route(origin: Tuple[float, float], dest: Tuple[float, float],
-                     vehicle_params: Dict[str, Any],
+                     vehicle_params: VehicleParams,
                      via: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
     """
+    Cached front for _call_here_route_uncached; only ok responses are kept.
+    """
+    key = _route_cache_key(origin, dest, vehicle_params, via)
+    now = time.monotonic()
+    with _ROUTE_CACHE_LOCK:
+        hit = _ROUTE_CACHE.get(key)
+        if hit is not None:
+            if now - hit[0] < _ROUTE_CACHE_TTL_SEC:
+                return dict(hit[1])
+            del _ROUTE_CACHE[key]
+
+    resp = _call_here_route_uncached(origin, dest, vehicle_params, via)
+    if resp.get("ok"):
+        with _ROUTE_CACHE_LOCK:
+            if len(_ROUTE_CACHE) >= _ROUTE_CACHE_MAX:
+                # oldest insertion first
+                del _ROUTE_CACHE[next(iter(_ROUTE_CACHE))]
+            _ROUTE_CACHE[key] = (now, resp)
+        resp = dict(resp)
+    return resp
+
+_call_here_route.cache_clear = _ROUTE_CACHE.clear
+
+def _call_here_route_uncached(origin: Tuple[float, float], dest: Tuple[float, float],
+                              vehicle_params: VehicleParams,
+                              via: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    """
     Calls HERE routes endpoint.
     If a 400 complains about 'return' or 'spans', retry without notices so older accounts still work.
     """
     base = "https://router.hereapi.com/v8/routes"
 
     def _do(params: Dict[str, Any]) -> requests.Response:
-        return requests.get(base, params=params, timeout=18)
+        return _SESSION.get(base, params=params, timeout=18)
 
-    params = dict(vehicle_params)
+    params = vehicle_params.to_query_dict()
     params["origin"] = f"{origin[0]},{origin[1]}"
     params["destination"] = f"{dest[0]},{dest[1]}"
     if via:
@@ -186,7 +264,7 @@ def _call_here_route(origin: Tuple[float, float], dest: Tuple[float, float],
 
     try:
         r = _do(params)
-        data = r.json() if r.content else {}
+        data = orjson.loads(r.content) if r.content else {}
         if r.status_code == 400:
             cause = ""
             try:
@@ -199,64 +277,58 @@ def _call_here_route(origin: Tuple[float, float], dest: Tuple[float, float],
                 if "spans" in p2: del p2["spans"]
                 p2["return"] = "summary,polyline,actions"
                 r = _do(p2)
-                data = r.json() if r.content else {}
+                data = orjson.loads(r.content) if r.content else {}
         ok = (r.status_code == 200 and "routes" in data and data["routes"])
         return {"ok": ok, "status": r.status_code, "raw": data}
     except Exception as e:
         return {"ok": False, "status": 0, "error": str(e), "raw": None}
 
-def _polyline_from_route_or_section(raw: Dict[str, Any]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
-    """Try to pull a polyline string from section; if missing, try route level."""
-    try:
-        route = raw["routes"][0]
-        for sec in route.get("sections", []):
-            if "polyline" in sec:
-                return sec.get("polyline"), sec
-        if "polyline" in route:
-            return route.get("polyline"), None
-    except Exception:
-        pass
-    return None, None
-
-def _extract_endpoints(sec: Optional[Dict[str, Any]], raw: Dict[str, Any]) -> Tuple[Tuple[float,float], Tuple[float,float]]:
-    """Get (dep, arr) from the section if present; else from route summary."""
-    if sec:
-        try:
-            dep_loc = sec.get("departure", {}).get("place", {}).get("location", {})
-            arr_loc = sec.get("arrival", {}).get("place", {}).get("location", {})
-            dep = (float(dep_loc.get("lat")), float(dep_loc.get("lng")))
-            arr = (float(arr_loc.get("lat")), float(arr_loc.get("lng")))
-            if all(abs(x) > 0 for x in [dep[0], dep[1], arr[0], arr[1]]):
-                return dep, arr
-        except Exception:
-            pass
-    try:
-        bounds = raw["routes"][0].get("bbox")
-        if bounds:
-            south, west, north, east = bounds
-            dep = (south, west); arr = (north, east)
-            return dep, arr
-    except Exception:
-        pass
-    return (0.0, 0.0), (0.0, 0.0)
-
 def _extract_summary_and_path(route_data: Dict[str, Any]):
     """
-    Extract route summary and a robust path for mapping.
+    Extract route summary and a robust path for mapping, in one walk over the first route:
+      - summary from the first section
+      - polyline from the first section carrying one, else the route level
+      - endpoints from that section's departure/arrival, else the route bbox
     """
     try:
         if not route_data or "routes" not in route_data or not route_data["routes"]:
             return {"ok": False}, []
         route = route_data["routes"][0]
-        sec0 = route.get("sections", [{}])[0]
+        sections = route.get("sections", [{}])
+        sec0 = sections[0]
+        sec0_summary = sec0.get("summary", {})
         summ = {
             "ok": True,
-            "duration": sec0.get("summary", {}).get("duration"),
-            "length": sec0.get("summary", {}).get("length"),
+            "duration": sec0_summary.get("duration"),
+            "length": sec0_summary.get("length"),
             "mode": "truck",
         }
-        poly_str, sec_poly = _polyline_from_route_or_section(route_data)
-        dep, arr = _extract_endpoints(sec_poly or sec0, route_data)
+
+        sec_poly = next((sec for sec in sections if "polyline" in sec), None)
+        poly_str = sec_poly.get("polyline") if sec_poly is not None else route.get("polyline")
+
+        dep = arr = None
+        sec_ends = sec_poly or sec0
+        if sec_ends:
+            try:
+                dep_loc = sec_ends.get("departure", {}).get("place", {}).get("location", {})
+                arr_loc = sec_ends.get("arrival", {}).get("place", {}).get("location", {})
+                d = (float(dep_loc.get("lat")), float(dep_loc.get("lng")))
+                a = (float(arr_loc.get("lat")), float(arr_loc.get("lng")))
+                if abs(d[0]) > 0 and abs(d[1]) > 0 and abs(a[0]) > 0 and abs(a[1]) > 0:
+                    dep, arr = d, a
+            except Exception:
+                pass
+        if dep is None:
+            try:
+                bounds = route.get("bbox")
+                if bounds:
+                    south, west, north, east = bounds
+                    dep = (south, west); arr = (north, east)
+            except Exception:
+                pass
+        if dep is None:
+            dep, arr = (0.0, 0.0), (0.0, 0.0)
 
         path: List[Tuple[float, float]] = []
         if poly_str:
@@ -265,23 +337,26 @@ def _extract_summary_and_path(route_data: Dict[str, Any]):
             except Exception:
                 path = []
 
-        def _same_area(a: Tuple[float,float], b: Tuple[float,float]) -> bool:
-            return haversine_m(a[0], a[1], b[0], b[1]) < 50000.0
-
-        if not path or not _same_area(path[0], dep) or not _same_area(path[-1], arr):
+        # the decoded line must start/end within 50 km of the endpoints, else fall back to a straight pair
+        if (not path
+                or haversine_m(path[0][0], path[0][1], dep[0], dep[1]) >= 50000.0
+                or haversine_m(path[-1][0], path[-1][1], arr[0], arr[1]) >= 50000.0):
             if all(abs(x) > 0 for x in [dep[0], dep[1], arr[0], arr[1]]):
                 path = [dep, arr]
             else:
                 path = []
 
-        cleaned = [(la, lo) for (la, lo) in path if -90.0 <= la <= 90.0 and -180.0 <= lo <= 180.0]
-        if len(cleaned) >= 2:
-            path = cleaned
-
         return summ, path
     except Exception:
         return {"ok": False}, []
 
+def _notice_title(n: Dict[str, Any]) -> str:
+    title = str(n.get("title") or n.get("message") or n.get("code") or "Notice")
+    cat = n.get("category") or n.get("type")
+    if cat and cat not in title:
+        title = f"{title} ({cat})"
+    return title
+
 def _collect_notices(raw: Optional[Dict[str, Any]]) -> List[str]:
     """
     Pull restriction/violation notices from route + sections + spans (if present).
@@ -290,50 +365,42 @@ def _collect_notices(raw: Optional[Dict[str, Any]]) -> List[str]:
     msgs: List[str] = []
     if not raw:
         return msgs
+    seen = set()
+
+    def _add(notices):
+        for n in notices or []:
+            title = _notice_title(n)
+            if title not in seen:
+                seen.add(title)
+                msgs.append(title)
+
     try:
         route = raw.get("routes", [{}])[0]
         # route-level
-        for n in route.get("notices", []) or []:
-            title = str(n.get("title") or n.get("message") or n.get("code") or "Notice")
-            cat = n.get("category") or n.get("type")
-            if cat and cat not in title:
-                title = f"{title} ({cat})"
-            if title not in msgs:
-                msgs.append(title)
+        _add(route.get("notices"))
         # section-level and spans
         for sec in route.get("sections", []) or []:
-            for n in sec.get("notices", []) or []:
-                title = str(n.get("title") or n.get("message") or n.get("code") or "Notice")
-                cat = n.get("category") or n.get("type")
-                if cat and cat not in title:
-                    title = f"{title} ({cat})"
-                if title not in msgs:
-                    msgs.append(title)
+            _add(sec.get("notices"))
             for sp in sec.get("spans", []) or []:
-                for n in sp.get("notices", []) or []:
-                    title = str(n.get("title") or n.get("message") or n.get("code") or "Notice")
-                    cat = n.get("category") or n.get("type")
-                    if cat and cat not in title:
-                        title = f"{title} ({cat})"
-                    if title not in msgs:
-                        msgs.append(title)
+                _add(sp.get("notices"))
     except Exception:
         pass
     return msgs
 
+# Keywords suggesting illegality/restriction for trucks, as one alternation
+_CRIT_KW = (
+    "violation", "forbidden", "prohibit", "no truck", "no trucks",
+    "low bridge", "low clearance", "clearance", "height", "overheight",
+    "weight", "gross weight", "gvm", "axle", "tunnel", "hazardous",
+)
+_CRIT_SEARCH = re.compile("|".join(map(re.escape, _CRIT_KW)), re.IGNORECASE).search
+
 def _has_critical(notices: List[str]) -> bool:
     """
     Heuristic: treat as critical if text suggests illegality/restriction for trucks.
+    Stops at the first notice that matches.
     """
-    if not notices:
-        return False
-    crit_kw = [
-        "violation", "forbidden", "prohibit", "no truck", "no trucks",
-        "low bridge", "low clearance", "clearance", "height", "overheight",
-        "weight", "gross weight", "gvm", "axle", "tunnel", "hazardous"
-    ]
-    low = " ".join(notices).lower()
-    return any(k in low for k in crit_kw)
+    return any(_CRIT_SEARCH(n) for n in notices)
 
 # Known via that biases against NYC tunnels when overheight (George Washington Bridge upper deck)
 GWB_UPPER = (40.85177, -73.95272)
@@ -378,8 +445,19 @@ def plan_with_height_analysis(
         tunnel_category=tunnel_category,
     )
 
+    nyc_like = (abs(end[0] - 40.75) < 0.5 and abs(end[1] - (-73.98)) < 0.7)
+    via_hint = GWB_UPPER if (total_height_ft > 13.5 and nyc_like) else None
+
+    # Primary and alternative are independent HERE calls: issue them together so the
+    # critical path is one round-trip instead of two.
+    # Without a via hint the alternative is the very same request, so reuse the primary.
+    primary_fut = _PRIMARY_POOL.submit(_call_here_route, start, end, vparams)
+    alt_try = _call_here_route(start, end, vparams, via=via_hint) if via_hint else None
+
     # -------- PRIMARY (to the exact destination) --------
-    primary = _call_here_route(start, end, vparams)
+    primary = primary_fut.result()
+    if alt_try is None:
+        alt_try = primary
     primary_summary, primary_path = _extract_summary_and_path(primary["raw"]) if primary["ok"] else ({"ok": False}, [])
     primary_notices = _collect_notices(primary["raw"]) if primary.get("ok") else []
     primary_critical = _has_critical(primary_notices) if primary.get("ok") else False
@@ -391,10 +469,6 @@ def plan_with_height_analysis(
     alternative_notices: List[str] = []
     alternative_critical = False
 
-    nyc_like = (abs(end[0] - 40.75) < 0.5 and abs(end[1] - (-73.98)) < 0.7)
-    via_hint = GWB_UPPER if (total_height_ft > 13.5 and nyc_like) else None
-
-    alt_try = _call_here_route(start, end, vparams, via=via_hint)
     if alt_try["ok"]:
         alternative = alt_try
         alternative_summary, alternative_path = _extract_summary_and_path(alternative["raw"])
@@ -420,6 +494,7 @@ def plan_with_height_analysis(
             vehicle_params=vparams,
             rings_m=[500, 1500, 3000, 5000, 8000],
             bearings=[0, 45, 90, 135, 180, 225, 270, 315],
+            warnings=warnings,
         )
         if cand:
             fallback_used = True
@@ -443,13 +518,16 @@ def plan_with_height_analysis(
         warnings.append(f"Total height {total_height_ft:.2f} ft exceeds common US interstate guideline (13'6\").")
 
     # Merge HERE notices into warnings (de-duplicated, human friendly)
+    warnings_seen = set(warnings)
+
     def _merge_notices(label: str, items: List[str]):
         for t in items or []:
             msg = t.strip()
             if not msg:
                 continue
             final = f"{label}: {msg}"
-            if final not in warnings:
+            if final not in warnings_seen:
+                warnings_seen.add(final)
                 warnings.append(final)
 
     _merge_notices("Primary notice", primary_notices)
@@ -514,26 +592,75 @@ def plan_with_height_analysis(
     }
 
 # ----------------- fallback finder -----------------
+def _is_throttled(resp: Dict[str, Any]) -> bool:
+    status = resp.get("status") or 0
+    return status == 429 or status >= 500
+
 def find_reachable_near_dest(
     start: Tuple[float, float],
     end: Tuple[float, float],
-    vehicle_params: Dict[str, Any],
+    vehicle_params: VehicleParams,
     rings_m: List[int],
     bearings: List[int],
+    warnings: Optional[List[str]] = None,
 ) -> Optional[Dict[str, Any]]:
+    """
+    Nearest reachable point around `end`, ring by ring; within a ring the first reachable
+    bearing (in `bearings` order) wins and the ring's remaining probes are cancelled.
+    Stops altogether once HERE answers two bearings in a row with 429/5xx (retries are
+    already exhausted by then); a note is appended to `warnings` if given.
+    """
     start = _float_pair(start)
     end = _float_pair(end)
     best = None
-    best_dist = 1e12
-    for r in rings_m:
-        for b in bearings:
-            cand = offset_point(end[0], end[1], r, b)
-            resp = _call_here_route(start, cand, vehicle_params)
-            if resp["ok"]:
-                dist = haversine_m(cand[0], cand[1], end[0], end[1])
-                if dist < best_dist:
-                    best = {"dest": cand, "raw": resp["raw"]}
-                    best_dist = dist
-        if best is not None:
-            break
+    bearing_trig = [(math.sin(br), math.cos(br)) for br in map(math.radians, bearings)]
+    fanout = max(1, min(_RING_FANOUT, len(bearings)))
+    # own small pool per search, separate from _PRIMARY_POOL: probes never delay a primary
+    pool = ThreadPoolExecutor(max_workers=fanout, thread_name_prefix="here-ring")
+    try:
+        for r in rings_m:
+            cands = _ring_offsets(end[0], end[1], r, bearing_trig)
+            resps: List[Optional[Dict[str, Any]]] = [None] * len(cands)
+            pending: Dict[Any, int] = {}
+            sent = 0    # next bearing to send
+            judged = 0  # next bearing to judge; answers are judged in bearing order
+            throttled_run = 0
+            throttled = False
+            while True:
+                while sent < len(cands) and len(pending) < fanout:
+                    pending[pool.submit(_call_here_route, start, cands[sent], vehicle_params)] = sent
+                    sent += 1
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    resps[pending.pop(fut)] = fut.result()
+                while judged < len(cands) and resps[judged] is not None:
+                    cand, resp = cands[judged], resps[judged]
+                    judged += 1
+                    if resp["ok"]:
+                        # every candidate on a ring is the same distance out: first in bearing order wins
+                        best = {"dest": cand, "raw": resp["raw"]}
+                        break
+                    if _is_throttled(resp):
+                        throttled_run += 1
+                        if throttled_run >= 2:
+                            throttled = True
+                            break
+                    else:
+                        throttled_run = 0
+                if best is not None or throttled:
+                    break
+            for fut in pending:
+                fut.cancel()  # no-op once in flight; their answers are simply ignored
+            if best is not None:
+                break
+            if throttled:
+                if warnings is not None:
+                    warnings.append(
+                        "HERE routing is throttling or unavailable; stopped searching for a staging point early."
+                    )
+                break
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
     return best
@@ -1,9 +1,14 @@
 # services/vehicles.py
-import json
-import re
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+
+from services.persistent_cache import PersistentCache
 
 # Fallback specs (approx curb weight & overall height) for common models you tested
 # Use conservative/taller & heavier values where ranges exist.
@@ -21,14 +26,34 @@ FALLBACK_SPECS = {
 
 CARQUERY_BASE = "https://www.carqueryapi.com/api/0.3/"  # free, no key
 
+# Reused keep-alive connection to CarQuery; transient 5xx are retried
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET",)),
+))
+_SESSION.headers.update({"User-Agent": "carhauler-backend"})
+
+# Optional on-disk cache of CarQuery trims (L2 behind the in-process lru_cache)
+CARQUERY_CACHE_ENABLE = os.getenv("CARQUERY_CACHE_ENABLE", "0") == "1"
+CARQUERY_CACHE_PATH = os.getenv("CARQUERY_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "carquery.sqlite"))
+CARQUERY_CACHE_MAX_AGE_DAYS = float(os.getenv("CARQUERY_CACHE_MAX_AGE_DAYS", "30"))
+_DISK_CACHE = PersistentCache(CARQUERY_CACHE_PATH, "trims", CARQUERY_CACHE_MAX_AGE_DAYS) if CARQUERY_CACHE_ENABLE else None
+
 def _to_ft(mm: float) -> float:
     return round((mm or 0.0) / 304.8, 2)
 
 def _to_lbs(kg: float) -> float:
     return round((kg or 0.0) * 2.20462262185, 0)
 
+@lru_cache(maxsize=2048)
 def _norm(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip().lower())
+    # lower-case + collapse whitespace; make/model strings repeat a lot across requests
+    return " ".join((s or "").lower().split())
+
+# Canonical keys so lookups with any casing/spacing hit after _norm
+FALLBACK_SPECS = {(_norm(mk), _norm(md), int(yr)): v for (mk, md, yr), v in FALLBACK_SPECS.items()}
 
 def _first_json_block(text: str) -> dict:
     """
@@ -41,7 +66,7 @@ def _first_json_block(text: str) -> dict:
     end = text.rfind("}")
     if start == -1 or end == -1 or end <= start:
         raise ValueError("No JSON object found in CarQuery response")
-    return json.loads(text[start:end+1])
+    return orjson.loads(text[start:end+1])
 
 @lru_cache(maxsize=512)
 def carquery_get_trims(make: str, model: str, year: int) -> List[dict]:
@@ -49,6 +74,11 @@ def carquery_get_trims(make: str, model: str, year: int) -> List[dict]:
     Query CarQuery for all trims matching year/make/model.
     Returns list of trims; each may contain model_height_mm, model_weight_kg.
     """
+    cache_key = f"{make}|{model}|{year}"
+    if _DISK_CACHE is not None:
+        hit = _DISK_CACHE.get(cache_key)
+        if hit is not None:
+            return hit
     params = {
         "cmd": "getTrims",
         "make": make,
@@ -56,10 +86,14 @@ def carquery_get_trims(make: str, model: str, year: int) -> List[dict]:
         "year": str(year),
     }
     # CarQuery prefers JSONP; we'll parse JSON out of it.
-    r = requests.get(CARQUERY_BASE, params=params, timeout=15)
+    r = _SESSION.get(CARQUERY_BASE, params=params, timeout=15)
     r.raise_for_status()
     data = _first_json_block(r.text)
-    return data.get("Trims") or []
+    trims = data.get("Trims") or []
+    # empty answers may be transient; only persist real trims
+    if trims and _DISK_CACHE is not None:
+        _DISK_CACHE.set(cache_key, trims)
+    return trims
 
 def resolve_vehicle_specs_once(make: str, model: str, year: int) -> Tuple[float, float, List[str]]:
     """
@@ -114,13 +148,24 @@ def resolve_vehicle_specs_once(make: str, model: str, year: int) -> Tuple[float,
     # 3) Give up
     raise ValueError(f"Could not resolve specs for {year} {make} {model}")
 
-def resolve_missing_specs(cars: List[Dict]) -> Tuple[List[Dict], List[str]]:
+def _resolve_or_error(key: Tuple[str, str, int]):
+    try:
+        return resolve_vehicle_specs_once(*key)
+    except Exception as e:
+        return e
+
+def resolve_missing_specs(cars: List[Dict], max_workers: int = 8) -> Tuple[List[Dict], List[str]]:
     """
     For each car, if height_ft or weight_lbs is **missing (None)**, resolve via CarQuery/fallback.
     If user provided a value, we keep it exactly as-is.
+    Each distinct (make, model, year), compared the way resolve_vehicle_specs_once
+    normalizes it, is looked up once, concurrently; warnings keep car order.
     """
     resolved: List[Dict] = []
     warnings: List[str] = []
+    pending = []  # (car, need_height, need_weight, lookup key or the error building it)
+    # normalized key -> the first car's own (make, model, year), which is what gets looked up
+    keys: Dict[Tuple[str, str, int], Tuple[str, str, int]] = {}
     for c in cars:
         car = dict(c)
 
@@ -132,15 +177,31 @@ def resolve_missing_specs(cars: List[Dict]) -> Tuple[List[Dict], List[str]]:
 
         if need_height or need_weight:
             try:
-                h_ft, w_lb, w = resolve_vehicle_specs_once(car["make"], car["model"], int(car["year"]))
-                warnings.extend(w)
-                if need_height:
-                    car["height_ft"] = h_ft
-                if need_weight:
-                    car["weight_lbs"] = w_lb
+                raw = (car["make"], car["model"], int(car["year"]))
+                key = (_norm(raw[0]), _norm(raw[1]), raw[2])
+                keys.setdefault(key, raw)
             except Exception as e:
-                warnings.append(str(e))
+                key = e
+            pending.append((car, need_height, need_weight, key))
 
         resolved.append(car)
 
-    return resolved, warnings
\ No newline at end of file
+    if len(keys) > 1 and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as ex:
+            results = dict(zip(keys, ex.map(_resolve_or_error, keys.values())))
+    else:
+        results = {k: _resolve_or_error(raw) for k, raw in keys.items()}
+
+    for car, need_height, need_weight, key in pending:
+        res = key if isinstance(key, Exception) else results[key]
+        if isinstance(res, Exception):
+            warnings.append(str(res))
+            continue
+        h_ft, w_lb, w = res
+        warnings.extend(w)
+        if need_height:
+            car["height_ft"] = h_ft
+        if need_weight:
+            car["weight_lbs"] = w_lb
+
+    return resolved, warnings
@@ -0,0 +1,62 @@
+import queue
+import time
+
+import orjson
+import pytest
+
+from services import analytics
+
+@pytest.fixture
+def events_file(tmp_path, monkeypatch):
+    path = tmp_path / "events.jsonl"
+    monkeypatch.setattr(analytics, "ANALYTICS_ENABLE", True)
+    monkeypatch.setattr(analytics, "ANALYTICS_PATH", str(path))
+    monkeypatch.setattr(analytics, "_QUEUE", queue.Queue(maxsize=10000))
+    monkeypatch.setattr(analytics, "_FLUSHER", None)
+    yield path
+    analytics._flush_remaining()
+
+def _read(path):
+    return [orjson.loads(line) for line in path.read_bytes().splitlines()]
+
+def test_flush_remaining_writes_every_event_in_order(events_file):
+    n = 250  # more than one flusher batch
+    for i in range(n):
+        analytics.log_event({"event": "plan", "i": i})
+    analytics._flush_remaining()
+    events = _read(events_file)
+    assert [e["i"] for e in events] == list(range(n))
+    assert all(e["ts_iso"].endswith("Z") for e in events)
+
+def test_full_queue_drops_events_instead_of_blocking(events_file, monkeypatch):
+    monkeypatch.setattr(analytics, "_QUEUE", queue.Queue(maxsize=3))
+    monkeypatch.setattr(analytics, "_ensure_flusher", lambda: None)  # nothing drains the queue
+    t0 = time.monotonic()
+    for i in range(10):
+        analytics.log_event({"event": "plan", "i": i})
+    assert time.monotonic() - t0 < 1.0
+    analytics._flush_remaining()
+    assert [e["i"] for e in _read(events_file)] == [0, 1, 2]
+
+def test_slow_writer_at_exit_keeps_the_queue(events_file, monkeypatch):
+    real_write = analytics._write_lines
+    writers = set()
+
+    def slow_write(lines):
+        writers.add(analytics.threading.current_thread().name)
+        time.sleep(0.1)
+        real_write(lines)
+
+    monkeypatch.setattr(analytics, "_write_lines", slow_write)
+    monkeypatch.setattr(analytics, "_EXIT_JOIN_SEC", 0.01)
+    n = 250  # three flusher batches, each slower than the exit join
+    for i in range(n):
+        analytics.log_event({"event": "plan", "i": i})
+    flusher = analytics._FLUSHER
+    analytics._flush_remaining()
+    # join timed out: the live flusher still owns the queue and nothing was drained here
+    assert flusher.is_alive() and analytics._FLUSHER is flusher
+    flusher.join(timeout=5.0)
+    assert not flusher.is_alive()
+    assert writers == {"analytics-flusher"}
+    assert [e["i"] for e in _read(events_file)] == list(range(n))
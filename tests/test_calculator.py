@@ -1,25 +1,61 @@
+import pytest
 
-from services.calculator import calculate_load
+from services.calculator import calculate_load, suggest_arrangement, calculate_and_arrange
 
-def test_calculate_under_limits():
+CIVIC = {"make": "Honda", "model": "Civic", "year": 2020, "weight_lbs": 2900, "height_ft": 4.8}
+F150 = {"make": "Ford", "model": "F-150", "year": 2021, "weight_lbs": 4500, "height_ft": 6.2}
+RAV4 = {"make": "Toyota", "model": "RAV4", "year": 2020, "weight_lbs": 3490, "height_ft": 5.58}
+RAM_2500 = {"make": "Ram", "model": "2500", "year": 2022, "weight_lbs": 40000, "height_ft": 6.0}
+
+@pytest.mark.parametrize(
+    "truck, trailer, deck, cars, total_weight, total_height",
+    [
+        pytest.param(18000, 15000, 5.0, [CIVIC, F150], 18000 + 15000 + 2900 + 4500, 5.0 + 6.2, id="two_cars"),
+        pytest.param(18000, 15000, 5.0, [], 18000 + 15000, 5.0, id="empty_deck"),
+    ],
+)
+def test_calculate_under_limits(truck, trailer, deck, cars, total_weight, total_height):
     result = calculate_load(
-        truck_weight_lbs=18000,
-        trailer_weight_lbs=15000,
-        trailer_height_ft=5.0,
-        cars=[
-            {"make": "Honda", "model": "Civic", "year": 2020, "weight_lbs": 2900, "height_ft": 4.8},
-            {"make": "Ford", "model": "F-150", "year": 2021, "weight_lbs": 4500, "height_ft": 6.2},
-        ],
+        truck_weight_lbs=truck,
+        trailer_weight_lbs=trailer,
+        trailer_height_ft=deck,
+        cars=cars,
     )
-    assert result["total_weight_lbs"] == 18000 + 15000 + 2900 + 4500
-    assert result["total_height_ft"] == 5.0 + 6.2
+    assert result["total_weight_lbs"] == total_weight
+    assert result["total_height_ft"] == total_height
     assert result["warnings"] == []
 
-def test_calculate_over_limits():
+@pytest.mark.parametrize(
+    "truck, trailer, deck, cars",
+    [
+        pytest.param(30000, 20000, 8.0, [RAM_2500], id="heavy_and_tall"),
+        pytest.param(18000, 15000, 8.0, [F150], id="tall_only"),
+    ],
+)
+def test_calculate_over_limits(truck, trailer, deck, cars):
     result = calculate_load(
-        truck_weight_lbs=30000,
-        trailer_weight_lbs=20000,
-        trailer_height_ft=8.0,
-        cars=[{"make": "Ram", "model": "2500", "year": 2022, "weight_lbs": 40000, "height_ft": 6.0}],
+        truck_weight_lbs=truck,
+        trailer_weight_lbs=trailer,
+        trailer_height_ft=deck,
+        cars=cars,
     )
     assert any("exceeds DOT limit" in w for w in result["warnings"])
+
+@pytest.mark.parametrize(
+    "cars",
+    [
+        pytest.param([CIVIC, F150, RAV4] * 3, id="full_load"),
+        pytest.param([CIVIC, F150, RAV4], id="partial_load"),
+        pytest.param([RAM_2500, CIVIC], id="over_limits"),
+        pytest.param([], id="empty"),
+    ],
+)
+def test_calculate_and_arrange_matches_separate_calls(cars):
+    fused = calculate_and_arrange(18000, 15000, 5.0, cars, max_height_ft=13.5, max_weight_lbs=80000)
+    assert fused["totals"] == calculate_load(18000, 15000, 5.0, cars)
+    assert fused["arrangement"] == suggest_arrangement(cars, 5.0, 13.5, 18000, 15000, 80000)
+
+def test_calculate_and_arrange_leaves_callers_cars_alone():
+    cars = [dict(CIVIC), dict(F150)]
+    calculate_and_arrange(18000, 15000, 5.0, cars)
+    assert cars == [CIVIC, F150]
@@ -0,0 +1,105 @@
+import pytest
+
+from services.geocoding import parse_latlng
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("40.7,-74", (40.7, -74.0)),
+        (" 40.7 , -74 ", (40.7, -74.0)),
+        ("+40.7,-74", (40.7, -74.0)),
+        ("40.,-74.", (40.0, -74.0)),
+        (".5,1", (0.5, 1.0)),
+        ("1e1,2", (10.0, 2.0)),
+        ("91,0", None),
+        ("nan,1", None),
+        ("Dallas, TX", None),
+        ("40.7", None),
+    ],
+)
+def test_parse_latlng(text, expected):
+    assert parse_latlng(text) == expected
+
+def test_main_uses_the_geocoding_parser():
+    main = pytest.importorskip("main")
+    assert main.parse_latlng is parse_latlng
+
+@pytest.fixture
+def here_calls(monkeypatch):
+    """Stub _call_here with a fixed US answer and record the params sent."""
+    from services import geocoding
+    calls = []
+
+    def fake_call_here(params, timeout_sec):
+        calls.append(dict(params))
+        return (32.7767, -96.797, "Dallas, TX, United States")
+
+    monkeypatch.setattr(geocoding, "_call_here", fake_call_here)
+    for clear in (geocoding.geocode_address.cache_clear,
+                  geocoding.geocode_with_label.cache_clear,
+                  geocoding._call_here_city_state_cached.cache_clear):
+        clear()
+    yield calls
+    geocoding.geocode_address.cache_clear()
+    geocoding.geocode_with_label.cache_clear()
+    geocoding._call_here_city_state_cached.cache_clear()
+
+def test_cache_key_is_normalized_but_query_is_sent_as_typed(here_calls):
+    from services.geocoding import geocode_address
+    assert geocode_address("Dallas,  TX, USA") == (32.7767, -96.797)
+    assert here_calls == [{"qq": "city=Dallas;state=TX;country=USA", "limit": 1}]
+    assert geocode_address("dallas, tx, usa") == (32.7767, -96.797)
+    assert len(here_calls) == 1
+
+def test_freeform_query_keeps_original_text(here_calls):
+    from services.geocoding import geocode_with_label
+    ans = geocode_with_label("1600 Pennsylvania Ave NW, Washington DC")
+    assert ans == ((32.7767, -96.797), "Dallas, TX, United States")
+    assert here_calls[0]["q"] == "1600 Pennsylvania Ave NW, Washington DC"
+    geocode_with_label("1600 pennsylvania ave nw,   washington dc")
+    assert len(here_calls) == 1
+
+def test_country_filter_promoted_after_repeated_alternate_wins(monkeypatch):
+    from services import geocoding
+    # module-level state: start from the default order and restore it afterwards
+    monkeypatch.setattr(geocoding, "_COUNTRY_FILTERS", ("countryCode:USA", "countryCode:US"))
+    monkeypatch.setattr(geocoding, "_ALT_FILTER_WINS", 0)
+    geocoding.geocode_address.cache_clear()
+    filters = []
+
+    def fake_call_here(params, timeout_sec):
+        filters.append(params.get("in"))
+        if params.get("in") == "countryCode:US":
+            return (39.29, -76.61, "Baltimore")
+        return None
+
+    monkeypatch.setattr(geocoding, "_call_here", fake_call_here)
+    for i in range(geocoding._FILTER_SWAP_AFTER):
+        assert geocoding._COUNTRY_FILTERS[0] == "countryCode:USA"
+        assert geocoding.geocode_address(f"{i} Light St Baltimore") == (39.29, -76.61)
+    assert filters == ["countryCode:USA", "countryCode:US"] * geocoding._FILTER_SWAP_AFTER
+    assert geocoding._COUNTRY_FILTERS == ("countryCode:US", "countryCode:USA")
+
+    filters.clear()
+    geocoding.geocode_address("100 Light St Baltimore")
+    assert filters == ["countryCode:US"]
+    geocoding.geocode_address.cache_clear()
+
+def test_geocode_many_keeps_order_dedupes_and_survives_failures(monkeypatch):
+    from services import geocoding
+    looked_up = []
+    answers = {"Baltimore, MD": (39.29, -76.61), "Dallas, TX": (32.78, -96.8)}
+
+    def fake_geocode_address(query, *, timeout_sec=10.0):
+        looked_up.append(query)
+        if query == "boom":
+            raise RuntimeError("HERE exploded")
+        return answers.get(query)
+
+    monkeypatch.setattr(geocoding, "geocode_address", fake_geocode_address)
+    out = geocoding.geocode_many(
+        ["Baltimore, MD", "nowhere", "Dallas, TX", "baltimore,  md", "boom", "Baltimore, MD"],
+        max_workers=4,
+    )
+    assert out == [(39.29, -76.61), None, (32.78, -96.8), (39.29, -76.61), None, (39.29, -76.61)]
+    assert sorted(looked_up) == sorted(["Baltimore, MD", "nowhere", "Dallas, TX", "boom"])
@@ -0,0 +1,74 @@
+import sqlite3
+import types
+
+import orjson
+import pytest
+
+from services import geocoding, persistent_cache
+from services.persistent_cache import PersistentCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(persistent_cache, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+def test_set_get_round_trip(tmp_path):
+    cache = PersistentCache(str(tmp_path / "sub" / "c.sqlite"), "t")
+    assert cache.get("k") is None
+    cache.set("k", [39.29, -76.61, "Baltimore, MD"])
+    assert cache.get("k") == [39.29, -76.61, "Baltimore, MD"]
+    # a fresh instance (e.g. after a restart) reads the same file
+    assert PersistentCache(str(tmp_path / "sub" / "c.sqlite"), "t").get("k") == [39.29, -76.61, "Baltimore, MD"]
+
+def test_entries_expire_after_max_age(tmp_path, clock):
+    cache = PersistentCache(str(tmp_path / "c.sqlite"), "t", max_age_days=1.0)
+    cache.set("k", {"v": 1})
+    clock[0] += 86400.0 - 1
+    assert cache.get("k") == {"v": 1}
+    clock[0] += 2
+    assert cache.get("k") is None
+
+def test_corrupt_db_is_a_miss(tmp_path):
+    path = tmp_path / "c.sqlite"
+    path.write_bytes(b"this is not a sqlite database" * 100)
+    cache = PersistentCache(str(path), "t")
+    assert cache.get("k") is None
+    cache.set("k", 1)  # must not raise
+    assert cache.get("k") is None
+
+def test_unwritable_location_is_a_miss(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("x")
+    cache = PersistentCache(str(blocker / "c.sqlite"), "t")  # parent is a regular file
+    cache.set("k", 1)
+    assert cache.get("k") is None
+
+class _Resp:
+    status_code = 200
+    content = orjson.dumps({"items": [{"title": "Baltimore, MD", "position": {"lat": 39.29, "lng": -76.61}}]})
+
+    def raise_for_status(self):
+        pass
+
+def test_call_here_serves_disk_hits_without_http(tmp_path, monkeypatch):
+    path = tmp_path / "geo.sqlite"
+    monkeypatch.setattr(geocoding, "_DISK_CACHE", PersistentCache(str(path), "geocode"))
+    monkeypatch.setattr(geocoding, "HERE_API_KEY", "secret-key")
+    gets = []
+
+    def fake_get(url, params=None, timeout=None):
+        gets.append(dict(params))
+        return _Resp()
+
+    monkeypatch.setattr(geocoding._SESSION, "get", fake_get)
+    params = {"q": "Baltimore MD", "limit": 1, "in": "countryCode:USA"}
+    assert geocoding._call_here(params, 5.0) == (39.29, -76.61, "Baltimore, MD")
+    assert geocoding._call_here(dict(params), 5.0) == (39.29, -76.61, "Baltimore, MD")
+    assert len(gets) == 1 and gets[0]["apiKey"] == "secret-key"
+
+    with sqlite3.connect(path) as conn:
+        keys = [k for (k,) in conn.execute("SELECT k FROM geocode")]
+    assert keys == ["in=countryCode:USA&limit=1&q=Baltimore MD"]
+    for f in tmp_path.glob("geo.sqlite*"):  # main file plus WAL
+        assert b"secret-key" not in f.read_bytes()
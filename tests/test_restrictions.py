@@ -0,0 +1,79 @@
+from services.restrictions import Facility, scan_polyline_against_facilities
+
+def _fac(name, bbox, min_height_ft):
+    return Facility(
+        name=name,
+        kind="tunnel",
+        bbox=bbox,
+        min_height_ft=min_height_ft,
+        notes="",
+        avoid_area_param="",
+    )
+
+FACILITIES = [
+    _fac("Low Tunnel", (39.245, -76.585, 39.265, -76.555), 13.5),
+    _fac("Tall Bridge", (40.850, -73.960, 40.855, -73.945), 15.0),
+    _fac("Whole Region", (30.0, -90.0, 45.0, -70.0), 12.0),
+]
+
+def test_scan_hits_keep_facility_order_and_flag_conflicts():
+    coords = [(40.852, -73.950), (39.255, -76.570)]
+    hits = scan_polyline_against_facilities(coords, FACILITIES, max_height_ft=14.0)
+    assert [h["facility"].name for h in hits] == ["Low Tunnel", "Tall Bridge", "Whole Region"]
+    assert [h["conflict"] for h in hits] == [True, False, True]
+
+def test_scan_bbox_edges_count_as_inside():
+    hits = scan_polyline_against_facilities([(39.265, -76.555)], FACILITIES[:2], max_height_ft=14.0)
+    assert [h["facility"].name for h in hits] == ["Low Tunnel"]
+
+def test_scan_misses_and_empty_route():
+    assert scan_polyline_against_facilities([(35.0, -100.0)], FACILITIES, max_height_ft=14.0) == []
+    assert scan_polyline_against_facilities([], FACILITIES, max_height_ft=14.0) == []
+
+def test_scan_conflicts_only_skips_cleared_facilities():
+    coords = [(40.852, -73.950), (39.255, -76.570)]
+    hits = scan_polyline_against_facilities(coords, FACILITIES, max_height_ft=14.0, conflicts_only=True)
+    assert [h["facility"].name for h in hits] == ["Low Tunnel", "Whole Region"]
+    assert all(h["conflict"] for h in hits)
+
+def _write_facilities(path, names, mtime_ns):
+    import os
+    import orjson
+    path.write_bytes(orjson.dumps({"facilities": [
+        {"name": n, "kind": "tunnel", "bbox": [39.2, -76.6, 39.3, -76.5],
+         "min_height_ft": 13.5, "avoid_area_param": "bbox:-76.6,39.2,-76.5,39.3"}
+        for n in names
+    ]}))
+    os.utime(path, ns=(mtime_ns, mtime_ns))  # explicit mtimes; filesystem clocks can be coarse
+
+def test_load_facilities_reloads_on_rewrite_and_drops_old_entry(tmp_path):
+    from services import restrictions
+    restrictions.load_facilities.cache_clear()
+    path = tmp_path / "facilities.json"
+    _write_facilities(path, ["Fort McHenry Tunnel"], 1_700_000_000_000_000_000)
+    first = restrictions.load_facilities(str(path))
+    assert [f.name for f in first] == ["Fort McHenry Tunnel"]
+    assert restrictions.load_facilities(str(path)) is first  # cached
+
+    _write_facilities(path, ["Fort McHenry Tunnel", "Harbor Tunnel"], 1_700_000_000_000_000_001)
+    second = restrictions.load_facilities(str(path))
+    assert [f.name for f in second] == ["Fort McHenry Tunnel", "Harbor Tunnel"]
+    assert list(restrictions._FAC_CACHE) == [(str(path.resolve()), 1_700_000_000_000_000_001)]
+    restrictions.load_facilities.cache_clear()
+
+def test_load_facilities_concurrent_cold_misses(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from services import restrictions
+    restrictions.load_facilities.cache_clear()
+    paths = []
+    for i in range(4):
+        p = tmp_path / f"f{i}.json"
+        _write_facilities(p, [f"T{i}"], 1_700_000_000_000_000_000)
+        paths.append(str(p))
+    with ThreadPoolExecutor(8) as ex:
+        loaded = list(ex.map(restrictions.load_facilities, paths * 25))
+    assert [fs[0].name for fs in loaded[:4]] == ["T0", "T1", "T2", "T3"]
+    assert len(restrictions._FAC_CACHE) == 4
+    # every caller of a given file got the one parsed list
+    assert all(fs is loaded[i % 4] for i, fs in enumerate(loaded))
+    restrictions.load_facilities.cache_clear()
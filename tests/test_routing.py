@@ -0,0 +1,167 @@
+import pytest
+
+from services.routing import decode_flexible_polyline
+
+# Examples from the flexible-polyline spec (https://github.com/heremaps/flexible-polyline)
+SPEC_POINTS = [
+    (50.10228, 8.69821),
+    (50.10201, 8.69567),
+    (50.10063, 8.69150),
+    (50.09878, 8.68752),
+]
+
+def test_decode_spec_example():
+    assert decode_flexible_polyline("BFoz5xJ67i1B1B7PzIhaxL7Y") == SPEC_POINTS
+
+def test_decode_drops_third_dimension():
+    assert decode_flexible_polyline("BlBoz5xJ67i1BU1B7PUzIhaUxL7YU") == SPEC_POINTS
+
+def test_decode_empty_and_invalid():
+    assert decode_flexible_polyline("") == []
+    with pytest.raises(ValueError):
+        decode_flexible_polyline("BFoz5xJ67i1B1B7PzIhaxL7")  # truncated
+    with pytest.raises(ValueError):
+        decode_flexible_polyline("BFoz5xJ!7i1B")  # not in the alphabet
+
+def _probe_stub(monkeypatch, answer):
+    """Replace the HERE route call with answer(dest); returns the list of probed dests."""
+    from services import routing
+    probed = []
+
+    def fake(origin, dest, vehicle_params, via=None):
+        probed.append(dest)
+        return answer(dest)
+
+    monkeypatch.setattr(routing, "_call_here_route", fake)
+    return probed
+
+def test_ring_search_stops_sending_after_first_bearing_wins(monkeypatch):
+    from services import routing
+    probed = _probe_stub(monkeypatch, lambda d: {"ok": True, "status": 200, "raw": {"routes": [1]}})
+    best = routing.find_reachable_near_dest(
+        start=(39.29, -76.61), end=(40.71, -74.0), vehicle_params=None,
+        rings_m=[500, 1500], bearings=[0, 45, 90, 135, 180, 225, 270, 315],
+    )
+    assert best["dest"] == routing.offset_point(40.71, -74.0, 500, 0)
+    # only the first window of bearings on the first ring was ever sent
+    assert len(probed) <= routing._RING_FANOUT
+
+@pytest.fixture
+def uncached_calls(monkeypatch):
+    """Stub the HERE call behind the route cache; ok unless the destination latitude is negative."""
+    from services import routing
+    calls = []
+
+    def fake(origin, dest, vehicle_params, via=None):
+        calls.append((dest, via))
+        if dest[0] < 0:
+            return {"ok": False, "status": 404, "raw": {"title": "no route"}}
+        return {"ok": True, "status": 200, "raw": {"routes": [{"sections": []}]}}
+
+    monkeypatch.setattr(routing, "_call_here_route_uncached", fake)
+    routing._call_here_route.cache_clear()
+    yield calls
+    routing._call_here_route.cache_clear()
+
+def _vparams(height_m=4.2):
+    from services.routing import _build_vehicle_params
+    return _build_vehicle_params(height_m, 30000.0, 22.0, 2.6, None, None, None)
+
+def test_route_cache_hit_within_ttl_then_expiry(uncached_calls, monkeypatch):
+    from services import routing
+    clock = [1000.0]
+    monkeypatch.setattr(routing.time, "monotonic", lambda: clock[0])
+    first = routing._call_here_route((39.29, -76.61), (40.71, -74.0), _vparams())
+    clock[0] += routing._ROUTE_CACHE_TTL_SEC - 1
+    again = routing._call_here_route((39.29, -76.61), (40.71, -74.0), _vparams())
+    assert again == first and again is not first
+    assert len(uncached_calls) == 1
+    clock[0] += 2
+    routing._call_here_route((39.29, -76.61), (40.71, -74.0), _vparams())
+    assert len(uncached_calls) == 2
+
+def test_route_cache_skips_failed_responses(uncached_calls):
+    from services import routing
+    for _ in range(2):
+        assert not routing._call_here_route((39.29, -76.61), (-1.0, -74.0), _vparams())["ok"]
+    assert len(uncached_calls) == 2
+
+def test_route_cache_key_equality(uncached_calls):
+    from services import routing
+    routing._call_here_route((39.29, -76.61), (40.71, -74.0), _vparams())
+    # rebuilt-but-equal VehicleParams and sub-1e-5 coordinate jitter share the entry
+    routing._call_here_route((39.29, -76.61), (40.710001, -74.0), _vparams())
+    assert len(uncached_calls) == 1
+    routing._call_here_route((39.29, -76.61), (40.71, -74.0), _vparams(height_m=4.3))
+    routing._call_here_route((39.29, -76.61), (40.71, -74.0), _vparams(), via=(40.85, -73.95))
+    assert len(uncached_calls) == 3
+
+def test_route_cache_evicts_oldest_first(uncached_calls):
+    from services import routing
+    vp = _vparams()
+    dests = [(30.0 + i * 1e-3, -74.0) for i in range(routing._ROUTE_CACHE_MAX + 1)]
+    for d in dests:
+        routing._call_here_route((39.29, -76.61), d, vp)
+    assert len(routing._ROUTE_CACHE) == routing._ROUTE_CACHE_MAX
+    n = len(uncached_calls)
+    routing._call_here_route((39.29, -76.61), dests[1], vp)   # still cached
+    assert len(uncached_calls) == n
+    routing._call_here_route((39.29, -76.61), dests[0], vp)   # evicted
+    assert len(uncached_calls) == n + 1
+
+@pytest.mark.parametrize(
+    "total_height_ft, expected_calls",
+    [
+        pytest.param(12.0, 1, id="no_via_reuses_primary"),
+        pytest.param(14.5, 2, id="via_hint_issues_alternative"),
+    ],
+)
+def test_alternative_call_count(uncached_calls, monkeypatch, total_height_ft, expected_calls):
+    from services import routing
+    monkeypatch.setattr(routing, "HERE_API_KEY", "test-key")
+    monkeypatch.setattr(routing, "_extract_summary_and_path", lambda raw: ({"ok": True}, []))
+    out = routing.plan_with_height_analysis(
+        (39.29, -76.61), (40.71, -74.0), 4.2, 30000.0, 22.0, 2.6, None, None, None,
+        total_height_ft, None,
+    )
+    assert out["primary_summary"] == {"ok": True}
+    assert len(uncached_calls) == expected_calls
+
+def test_retry_sleeps_are_capped():
+    from urllib3.response import HTTPResponse
+    from urllib3.util.retry import RequestHistory
+    from services import routing
+    retry = routing._SESSION.get_adapter("https://router.hereapi.com").max_retries
+    assert isinstance(retry, routing._CappedRetry)
+    throttled = HTTPResponse(body=b"", headers={"Retry-After": "120"}, status=429)
+    assert retry.get_retry_after(throttled) == routing._CappedRetry.MAX_SLEEP_SEC
+    long_history = routing._CappedRetry(
+        total=10, backoff_factor=5.0,
+        history=(RequestHistory("GET", "/", None, 503, None),) * 6,
+    )
+    assert long_history.get_backoff_time() == routing._CappedRetry.MAX_SLEEP_SEC
+
+class _Throttled:
+    status_code = 429
+    content = b'{"title": "Too Many Requests"}'
+
+def test_ring_search_stops_on_throttling(monkeypatch):
+    from services import routing
+    gets = []  # 429s are never cached, so every probe reaches the session
+
+    def fake_get(url, params=None, timeout=None):
+        gets.append(params["destination"])
+        return _Throttled()
+
+    monkeypatch.setattr(routing, "HERE_API_KEY", "test-key")
+    monkeypatch.setattr(routing._SESSION, "get", fake_get)
+    warnings = []
+    best = routing.find_reachable_near_dest(
+        start=(39.29, -76.61), end=(40.71, -74.0), vehicle_params=_vparams(),
+        rings_m=[500, 1500, 3000, 5000, 8000], bearings=[0, 45, 90, 135, 180, 225, 270, 315],
+        warnings=warnings,
+    )
+    assert best is None
+    assert warnings == ["HERE routing is throttling or unavailable; stopped searching for a staging point early."]
+    # only the first ring's first window was ever sent, instead of 5 rings x 8 bearings
+    assert len(gets) <= routing._RING_FANOUT
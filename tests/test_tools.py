@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(REPO, "tools", "plan_route_to_geojson.py")
+
+def test_script_run_directly_uses_backend_decoder(tmp_path):
+    # a plain `python tools/plan_route_to_geojson.py` from outside the repo
+    probe = (
+        "import runpy, sys\n"
+        "ns = runpy.run_path(sys.argv[1])\n"
+        "d = ns['decode_polyline']\n"
+        "print(d.__code__.co_filename)\n"
+        "print(d('BlBoz5xJ67i1BU1B7PUzIhaUxL7YU')[0])\n"
+        "print('services' in sys.modules, 'flexpolyline' in sys.modules)\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", probe, SCRIPT], cwd=tmp_path, capture_output=True, text=True, check=True,
+    ).stdout.splitlines()
+    assert out == [
+        os.path.join(REPO, "services", "polyline.py"),
+        "(50.10228, 8.69821)",  # 3D input still decodes to (lat, lng)
+        "False False",
+    ]
+    help_run = subprocess.run([sys.executable, SCRIPT, "--help"], cwd=tmp_path, capture_output=True, text=True)
+    assert help_run.returncode == 0 and "--batch" in help_run.stdout
+
+def _load_tool():
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("plan_route_to_geojson", SCRIPT)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+FC = {"type": "FeatureCollection", "features": [
+    {"type": "Feature", "geometry": {"type": "LineString", "coordinates": [[-74.0, 40.0]] * 500},
+     "properties": {"meta": {"warnings": ["Too tall"]}}},
+]}
+
+def test_write_geojson_gzip_round_trip(tmp_path):
+    import gzip
+    import orjson
+    tool = _load_tool()
+    out = str(tmp_path / "out.geojson.gz")
+    note = tool.write_geojson(FC, out)
+    with gzip.open(out, "rb") as f:
+        assert orjson.loads(f.read()) == FC
+    assert "bytes raw" in note and "gzipped" in note
+    plain = str(tmp_path / "out.geojson")
+    tool.write_geojson(FC, plain)
+    with open(plain, "rb") as f:
+        assert orjson.loads(f.read()) == FC
+
+def test_batch_writes_one_file_per_row_and_survives_failures(tmp_path, monkeypatch, capsys):
+    import orjson
+    import pytest
+    tool = _load_tool()
+    seen = []
+
+    def fake_plan_one(payload):
+        seen.append(payload)
+        if payload["origin"] == "bad":
+            raise tool.HereError({"status": 400, "title": "bad origin"})
+        if payload["origin"] == "down":
+            raise RuntimeError("connection refused")
+        return FC, {"warnings": []}
+
+    monkeypatch.setattr(tool, "plan_one", fake_plan_one)
+    rows = tmp_path / "in.jsonl"
+    rows.write_text(
+        '{"origin": "1,2", "destination": "3,4"}\n'
+        "\n"
+        '{"origin": "bad", "destination": "3,4"}\n'
+        '{"origin": "5,6", "destination": "7,8", "tunnel_category": "C"}\n'
+        '{"origin": "down", "destination": "7,8"}\n'
+    )
+    out_dir = tmp_path / "out"
+    monkeypatch.setattr(sys, "argv", [
+        "plan_route_to_geojson.py", "--batch", str(rows), "--out_dir", str(out_dir), "--workers", "3",
+    ])
+    with pytest.raises(SystemExit, match="2 of 4 routes failed"):
+        tool.main()
+
+    assert sorted(os.listdir(out_dir)) == ["route_1.geojson", "route_3.geojson"]
+    assert orjson.loads((out_dir / "route_3.geojson").read_bytes()) == FC
+    # rows are merged over the CLI defaults
+    by_origin = {p["origin"]: p for p in seen}
+    assert set(by_origin) == {"1,2", "bad", "5,6", "down"}
+    assert by_origin["5,6"]["tunnel_category"] == "C" and by_origin["1,2"]["tunnel_category"] is None
+    assert by_origin["1,2"]["truck_length_ft"] == 40.0
+    printed = capsys.readouterr().out.splitlines()
+    assert [line[0] for line in printed] == ["✅", "❌", "✅", "❌"]
@@ -0,0 +1,95 @@
+import pytest
+
+from services import vehicles
+
+@pytest.fixture
+def spec_lookups(monkeypatch):
+    """Stub resolve_vehicle_specs_once; unknown models raise like the real one."""
+    calls = []
+    specs = {("honda", "civic"): (4.64, 2771.0), ("ford", "f-150"): (6.43, 4705.0)}
+
+    def fake(make, model, year):
+        calls.append((make, model, year))
+        hw = specs.get((make.lower(), model.lower()))
+        if hw is None:
+            raise ValueError(f"Could not resolve specs for {year} {make} {model}")
+        return hw[0], hw[1], [f"note for {year} {make} {model}"]
+
+    monkeypatch.setattr(vehicles, "resolve_vehicle_specs_once", fake)
+    return calls
+
+def test_resolve_missing_specs_dedupes_and_keeps_car_order(spec_lookups):
+    cars = [
+        {"make": "Honda", "model": "Civic", "year": 2020},
+        {"make": "Ford", "model": "F-150", "year": 2021, "height_ft": 7.0},
+        {"make": "Mystery", "model": "X", "year": 2020},
+        {"make": "honda", "model": " civic ", "year": "2020", "weight_lbs": 3000},
+        {"model": "Civic", "year": 2020},
+        {"make": "Tesla", "model": "Model 3", "year": 2020, "height_ft": 4.7, "weight_lbs": 4000},
+    ]
+    resolved, warnings = vehicles.resolve_missing_specs(cars, max_workers=4)
+
+    # Honda/honda share one lookup (made with the first car's spelling); complete cars skip it
+    assert sorted(spec_lookups) == sorted([
+        ("Honda", "Civic", 2020), ("Ford", "F-150", 2021), ("Mystery", "X", 2020),
+    ])
+    assert [(c.get("height_ft"), c.get("weight_lbs")) for c in resolved] == [
+        (4.64, 2771.0), (7.0, 4705.0), (None, None), (4.64, 3000), (None, None), (4.7, 4000),
+    ]
+    assert warnings == [
+        "note for 2020 Honda Civic",
+        "note for 2021 Ford F-150",
+        "Could not resolve specs for 2020 Mystery X",
+        "note for 2020 Honda Civic",
+        str(KeyError("make")),
+    ]
+    assert cars[0] == {"make": "Honda", "model": "Civic", "year": 2020}  # inputs untouched
+
+class _TrimsResp:
+    def __init__(self, trims):
+        self.text = '?({"Trims": %s});' % ("[]" if not trims else '[{"model_height_mm": "1415"}]')
+
+    def raise_for_status(self):
+        pass
+
+@pytest.fixture
+def carquery(monkeypatch, tmp_path):
+    gets = []
+    answers = {"civic": True, "nothing": False}
+
+    def fake_get(url, params=None, timeout=None):
+        gets.append(params["model"])
+        return _TrimsResp(answers[params["model"]])
+
+    monkeypatch.setattr(vehicles._SESSION, "get", fake_get)
+    vehicles.carquery_get_trims.cache_clear()
+    yield gets
+    vehicles.carquery_get_trims.cache_clear()
+
+def test_carquery_disk_cache_hit_skips_http_and_skips_empty(carquery, monkeypatch, tmp_path):
+    cache = vehicles.PersistentCache(str(tmp_path / "cq.sqlite"), "trims")
+    monkeypatch.setattr(vehicles, "_DISK_CACHE", cache)
+    assert vehicles.carquery_get_trims("honda", "civic", 2020) == [{"model_height_mm": "1415"}]
+    assert vehicles.carquery_get_trims("honda", "nothing", 2020) == []
+    vehicles.carquery_get_trims.cache_clear()  # as after a restart: only the disk cache is left
+    assert vehicles.carquery_get_trims("honda", "civic", 2020) == [{"model_height_mm": "1415"}]
+    assert vehicles.carquery_get_trims("honda", "nothing", 2020) == []
+    assert carquery == ["civic", "nothing", "nothing"]
+    assert cache.get("honda|nothing|2020") is None
+
+@pytest.mark.parametrize("flag, enabled", [(None, False), ("0", False), ("1", True)])
+def test_carquery_disk_cache_only_with_env_flag(tmp_path, flag, enabled):
+    # module-level switch, so check it in a fresh interpreter
+    import os
+    import subprocess
+    import sys
+    env = {k: v for k, v in os.environ.items() if not k.startswith("CARQUERY_CACHE_")}
+    env["CARQUERY_CACHE_PATH"] = str(tmp_path / "cq.sqlite")
+    if flag is not None:
+        env["CARQUERY_CACHE_ENABLE"] = flag
+    out = subprocess.run(
+        [sys.executable, "-c", "from services import vehicles; print(vehicles._DISK_CACHE is not None)"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    assert out.strip() == str(enabled)
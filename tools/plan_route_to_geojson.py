@@ -1,13 +1,31 @@
 #!/usr/bin/env python3
-import json
+import os
+import gzip
 import argparse
-from pathlib import Path
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 
+import orjson
 import requests
-import flexpolyline
+from requests.adapters import HTTPAdapter
+
+# Same table-driven decoder the backend uses (2-tuples, out-of-range points dropped),
+# loaded straight from its file so every launch mode gets it without touching sys.path
+# or importing the `services` package.
+_POLYLINE_PY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "services", "polyline.py")
+_spec = importlib.util.spec_from_file_location("_carhauler_polyline", _POLYLINE_PY)
+_polyline = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_polyline)
+decode_polyline = _polyline.decode_flexible_polyline
 
 API_URL = "http://127.0.0.1:8000/plan-route"
 
+# Keep-alive session so repeated/scripted calls reuse the connection to the backend
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
 def build_payload(args):
     # You can tweak defaults here for quick tests
     return {
@@ -39,7 +57,7 @@ def decode_first_polyline(route_data):
         # pick the first section that has a polyline
         for sec in sections:
             if "polyline" in sec:
-                return flexpolyline.decode(sec["polyline"]), sec
+                return decode_polyline(sec["polyline"]), sec
         raise KeyError("No polyline found in sections.")
     except Exception as e:
         raise RuntimeError(f"Could not extract/ decode polyline: {e}")
@@ -64,69 +82,142 @@ def to_feature_collection(coords_latlon, section, meta):
     })
 
     # Start / End points (if available)
-    dep = section.get("departure", {}).get("place", {}).get("location", {})
-    arr = section.get("arrival", {}).get("place", {}).get("location", {})
-    if "lat" in dep and "lng" in dep:
-        features.append({
-            "type": "Feature",
-            "geometry": {"type": "Point", "coordinates": [dep["lng"], dep["lat"]]},
-            "properties": {"role": "start"}
-        })
-    if "lat" in arr and "lng" in arr:
+    for role, side in (("start", "departure"), ("end", "arrival")):
+        try:
+            loc = section[side]["place"]["location"]
+            coords = [loc["lng"], loc["lat"]]
+        except (KeyError, TypeError):
+            continue
         features.append({
             "type": "Feature",
-            "geometry": {"type": "Point", "coordinates": [arr["lng"], arr["lat"]]},
-            "properties": {"role": "end"}
+            "geometry": {"type": "Point", "coordinates": coords},
+            "properties": {"role": role}
         })
 
     return {"type": "FeatureCollection", "features": features}
 
-def main():
-    parser = argparse.ArgumentParser(description="Call /plan-route, decode HERE polyline, write GeoJSON.")
-    parser.add_argument("--origin", required=True, help='e.g. "52.5308,13.3847"')
-    parser.add_argument("--destination", required=True, help='e.g. "52.5264,13.3686"')
-    parser.add_argument("--truck_weight_lbs", type=float, default=30000)
-    parser.add_argument("--trailer_weight_lbs", type=float, default=15000)
-    parser.add_argument("--trailer_height_ft", type=float, default=5.0, help="Deck height, not total trailer height")
-    parser.add_argument("--truck_length_ft", type=float, default=40.0)
-    parser.add_argument("--truck_width_ft", type=float, default=8.5)
-    parser.add_argument("--weight_per_axle_lbs", type=float, default=None)
-    parser.add_argument("--hazmat", default=None, help='e.g. "flammable"')
-    parser.add_argument("--tunnel_category", default=None, help='e.g. "C"')
-    parser.add_argument("--out", default="route.geojson")
-    args = parser.parse_args()
+class HereError(RuntimeError):
+    """HERE answered with an error body instead of routes."""
+    def __init__(self, body):
+        super().__init__("HERE API returned an error.")
+        self.body = body
 
-    payload = build_payload(args)
-    r = requests.post(API_URL, json=payload, timeout=30)
+def plan_one(payload):
+    """
+    POST one payload to /plan-route and turn the answer into GeoJSON.
+    Returns (FeatureCollection, meta); raises HereError if HERE sent an error body.
+    """
+    r = SESSION.post(API_URL, json=payload, timeout=30)
     r.raise_for_status()
-    data = r.json()
+    data = orjson.loads(r.content)
+    route_obj = data.get("route", {})
 
     # Check for HERE errors
-    here = data.get("route", {}).get("route_data", {})
+    here = route_obj.get("route_data", {})
     if "status" in here and here.get("status") != 200 and "routes" not in here:
         # Likely an error structure from HERE
-        print(json.dumps(here, indent=2))
-        raise SystemExit("HERE API returned an error (see above).")
+        raise HereError(here)
 
     # Extract/ decode the first polyline
     coords, section = decode_first_polyline(here)
 
     # Build metadata (useful in GIS properties)
     meta = {
-        "warnings": data.get("route", {}).get("warnings", []),
-        "sent_vehicle_profile": data.get("route", {}).get("sent_vehicle_profile", {}),
+        "warnings": route_obj.get("warnings", []),
+        "sent_vehicle_profile": route_obj.get("sent_vehicle_profile", {}),
         "totals_for_here": data.get("totals_for_here", {}),
     }
 
-    fc = to_feature_collection(coords, section, meta)
-
-    out_path = Path(args.out).resolve()
-    out_path.write_text(json.dumps(fc, indent=2))
-    print(f"✅ Wrote GeoJSON to: {out_path}")
-    if meta["warnings"]:
+    return to_feature_collection(coords, section, meta), meta
+
+def write_geojson(fc, out):
+    """Write fc to out (gzip when it ends in .gz). Returns a human-readable size note."""
+    body = orjson.dumps(fc, option=orjson.OPT_INDENT_2)
+    if out.endswith(".gz"):
+        # Coordinate text compresses very well; handy for routes served to web maps
+        with gzip.open(out, "wb", compresslevel=6) as f:
+            f.write(body)
+        return f"{len(body):,} bytes raw, {os.path.getsize(out):,} bytes gzipped"
+    with open(out, "wb") as f:
+        f.write(body)
+    return f"{len(body):,} bytes"
+
+def print_warnings(warnings):
+    if warnings:
         print("⚠️ Warnings:")
-        for w in meta["warnings"]:
+        for w in warnings:
             print(f" - {w}")
 
+def run_batch(args):
+    """
+    Plan every route in args.batch (JSON Lines; each object overrides the CLI defaults,
+    e.g. {"origin": "...", "destination": "..."}) concurrently over the shared SESSION.
+    Writes route_{i}.geojson into args.out_dir, i counting input routes from 1.
+    """
+    base = build_payload(args)
+    with open(args.batch, "rb") as f:
+        payloads = [{**base, **orjson.loads(line)} for line in f if line.strip()]
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    suffix = ".geojson.gz" if args.out.endswith(".gz") else ".geojson"
+
+    def _one(job):
+        i, payload = job
+        out = os.path.join(args.out_dir, f"route_{i}{suffix}")
+        try:
+            fc, meta = plan_one(payload)
+            return out, write_geojson(fc, out), meta["warnings"], None
+        except HereError as e:
+            return out, None, [], orjson.dumps(e.body).decode()
+        except Exception as e:
+            return out, None, [], str(e)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        # map keeps input order, so the log reads in the same order as the batch file
+        for out, size, warnings, err in pool.map(_one, enumerate(payloads, 1)):
+            if err is not None:
+                failed += 1
+                print(f"❌ {os.path.abspath(out)}: {err}")
+                continue
+            print(f"✅ Wrote GeoJSON to: {os.path.abspath(out)} ({size})")
+            print_warnings(warnings)
+    if failed:
+        raise SystemExit(f"{failed} of {len(payloads)} routes failed.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Call /plan-route, decode HERE polyline, write GeoJSON.")
+    parser.add_argument("--origin", help='e.g. "52.5308,13.3847"')
+    parser.add_argument("--destination", help='e.g. "52.5264,13.3686"')
+    parser.add_argument("--truck_weight_lbs", type=float, default=30000)
+    parser.add_argument("--trailer_weight_lbs", type=float, default=15000)
+    parser.add_argument("--trailer_height_ft", type=float, default=5.0, help="Deck height, not total trailer height")
+    parser.add_argument("--truck_length_ft", type=float, default=40.0)
+    parser.add_argument("--truck_width_ft", type=float, default=8.5)
+    parser.add_argument("--weight_per_axle_lbs", type=float, default=None)
+    parser.add_argument("--hazmat", default=None, help='e.g. "flammable"')
+    parser.add_argument("--tunnel_category", default=None, help='e.g. "C"')
+    parser.add_argument("--out", default="route.geojson", help='Output path; a ".gz" suffix writes gzip')
+    parser.add_argument("--batch", default=None, help="JSON Lines file of payload overrides, one route per line")
+    parser.add_argument("--out_dir", default=".", help="Where --batch writes route_{i}.geojson")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests in --batch mode")
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args)
+        return
+    if not args.origin or not args.destination:
+        parser.error("--origin and --destination are required (unless --batch is given)")
+
+    try:
+        fc, meta = plan_one(build_payload(args))
+    except HereError as e:
+        print(orjson.dumps(e.body, option=orjson.OPT_INDENT_2).decode())
+        raise SystemExit("HERE API returned an error (see above).")
+
+    size = write_geojson(fc, args.out)
+    print(f"✅ Wrote GeoJSON to: {os.path.abspath(args.out)} ({size})")
+    print_warnings(meta["warnings"])
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()